@@ -0,0 +1,345 @@
+"""Throughput and latency of the prefect_ovh tasks against the fake API
+
+Every operation (job submission, polling and log tailing) is run through
+layers of increasing cost, so a regression can be pinned on the HTTP client,
+on `call_api` (rate limiter, coalescing, metrics, tracing) or on Prefect:
+
+- `sdk per-call client`: a new client per call, without connection reuse
+- `sdk pooled client`: the SDK endpoints on the pooled client
+- `call_api`: the wrapper used by the tasks
+- `task.fn`: the body of the task, without the Prefect engine
+- `task run`: the task called in a flow, with its task run
+
+and their async counterparts. Run it from the root of the repository:
+
+    python -m benchmarks.bench_tasks --calls 500 --concurrency 10
+
+Save the results with `--save baseline.json`, then compare a later run with
+`--baseline baseline.json`: the script exits with 1 if an operation got slower
+than its baseline by more than `--tolerance`. The fake API runs in the same
+process, so compare runs made on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ov_hcloud_ai_solution_client import AuthenticatedClient
+from ov_hcloud_ai_solution_client.api.job import job_get, job_log, job_new
+from ov_hcloud_ai_solution_client.models import JobSpec
+from prefect import flow
+
+from prefect_ovh.client import (
+    acall_api,
+    call_api,
+    close_async_pooled_clients,
+    get_async_client_for,
+    get_pooled_client,
+)
+from prefect_ovh.fake_api import FakeAITrainingAPI
+from prefect_ovh.rate_limit import configure_rate_limiter
+from prefect_ovh.tasks import (
+    create_a_job,
+    create_a_job_async,
+    get_infos_of_job,
+    get_infos_of_job_async,
+    get_new_logs_of_job,
+    get_new_logs_of_job_async,
+)
+
+TOKEN = "benchmark"
+SPEC = {"image": "ubuntu", "command": ["sleep", "3600"], "resources": {"gpu": 1}}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks and compare them with a baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--calls", type=int, default=200, help="calls per run")
+    parser.add_argument(
+        "--task-run-calls",
+        type=int,
+        default=50,
+        help="calls of the task run scenarios, slower by orders of magnitude",
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added by the fake API"
+    )
+    parser.add_argument("--skip-task-runs", action="store_true")
+    parser.add_argument("--save", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare with the results of this file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="the throughput drop from the baseline counted as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    with FakeAITrainingAPI(
+        latency=args.latency, state_durations=(("RUNNING", 3600),), log_interval=0.1
+    ) as api:
+        results = run_benchmarks(
+            api.url,
+            calls=args.calls,
+            task_run_calls=0 if args.skip_task_runs else args.task_run_calls,
+            concurrency=args.concurrency,
+        )
+    print(format_results(results))
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+def run_benchmarks(
+    base_url: str, calls: int, task_run_calls: int, concurrency: int
+) -> List[Dict[str, Any]]:
+    """Run every operation through every layer
+
+    Args:
+        base_url (str): the url of the fake API
+        calls (int): the number of calls of each scenario
+        task_run_calls (int): the number of calls of the task run scenarios,
+            0 to skip them
+        concurrency (int): the number of calls in flight
+
+    Returns:
+        List[Dict[str, Any]]: the `operation`, `variant`, `calls`, `seconds`,
+            `ops_per_s`, `p50_ms` and `p99_ms` of every scenario
+    """
+    # the benchmarks measure the client, not the client-side rate limit
+    configure_rate_limiter(TOKEN, base_url, rate=1e9, capacity=1e9)
+    client = get_pooled_client(TOKEN, base_url)
+    # distinct jobs keep identical concurrent polls from being coalesced
+    job_ids = [
+        json.loads(create_a_job.fn(client, image="ubuntu"))["id"]
+        for _ in range(max(calls, task_run_calls))
+    ]
+    operations = {
+        "submit": (
+            job_new,
+            lambda i: {"json_body": JobSpec.from_dict(SPEC)},
+            create_a_job,
+            create_a_job_async,
+            lambda i: {"image": "ubuntu", "command": SPEC["command"]},
+        ),
+        "poll": (
+            job_get,
+            lambda i: {"id": job_ids[i]},
+            get_infos_of_job,
+            get_infos_of_job_async,
+            lambda i: {"id_job": job_ids[i], "use_cache": False},
+        ),
+        "tail": (
+            job_log,
+            lambda i: {"id": job_ids[i]},
+            get_new_logs_of_job,
+            get_new_logs_of_job_async,
+            lambda i: {"id_job": job_ids[i]},
+        ),
+    }
+
+    results = []
+    for operation, (
+        endpoint,
+        kwargs,
+        task,
+        async_task,
+        task_kwargs,
+    ) in operations.items():
+
+        def per_call_client(i, endpoint=endpoint, kwargs=kwargs):
+            """Call the SDK with a client opened and closed for the call"""
+            new_client = AuthenticatedClient(base_url=base_url, token=TOKEN)
+            try:
+                return endpoint.sync_detailed(client=new_client, **kwargs(i))
+            finally:
+                new_client.get_httpx_client().close()
+
+        sync_variants = {
+            "sdk per-call client": per_call_client,
+            "sdk pooled client": lambda i, endpoint=endpoint, kwargs=kwargs: (
+                endpoint.sync_detailed(client=client, **kwargs(i))
+            ),
+            "call_api": lambda i, endpoint=endpoint, kwargs=kwargs: call_api(
+                endpoint, client, **kwargs(i)
+            ),
+            "task.fn": lambda i, task=task, task_kwargs=task_kwargs: task.fn(
+                client=client, **task_kwargs(i)
+            ),
+        }
+        for variant, call in sync_variants.items():
+            latencies, seconds = run_threads(call, calls, concurrency)
+            results.append(_result(operation, variant, latencies, seconds))
+
+        async def sdk_async(i, endpoint=endpoint, kwargs=kwargs):
+            """Call the async SDK with the pooled client of the loop"""
+            async_client = get_async_client_for(client)
+            return await endpoint.asyncio_detailed(client=async_client, **kwargs(i))
+
+        async_variants = {
+            "async sdk pooled client": sdk_async,
+            "acall_api": lambda i, endpoint=endpoint, kwargs=kwargs: acall_api(
+                endpoint, client, **kwargs(i)
+            ),
+            "async task.fn": lambda i, task=async_task, task_kwargs=task_kwargs: (
+                task.fn(client=client, **task_kwargs(i))
+            ),
+        }
+        for variant, call in async_variants.items():
+            latencies, seconds = asyncio.run(run_coroutines(call, calls, concurrency))
+            results.append(_result(operation, variant, latencies, seconds))
+
+        if task_run_calls:
+            latencies, seconds = run_task_runs(
+                task, task_kwargs, client, task_run_calls
+            )
+            results.append(_result(operation, "task run", latencies, seconds))
+    return results
+
+
+def run_threads(
+    call: Callable[[int], Any], calls: int, concurrency: int
+) -> Tuple[List[float], float]:
+    """Make `calls` calls from `concurrency` threads
+
+    Returns:
+        Tuple[List[float], float]: the latency of every call and the total
+            seconds
+    """
+
+    def timed(i):
+        """Return the seconds taken by call `i`"""
+        start = time.perf_counter()
+        call(i)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, range(calls)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_coroutines(
+    call: Callable[[int], Any], calls: int, concurrency: int
+) -> Tuple[List[float], float]:
+    """Make `calls` calls with at most `concurrency` of them in flight
+
+    Returns:
+        Tuple[List[float], float]: the latency of every call and the total
+            seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i):
+        """Return the seconds taken by call `i`, waiting excluded"""
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(i) for i in range(calls)))
+    seconds = time.perf_counter() - start
+    await close_async_pooled_clients()
+    return list(latencies), seconds
+
+
+def run_task_runs(
+    task, task_kwargs: Callable[[int], dict], client, calls: int
+) -> Tuple[List[float], float]:
+    """Call a task `calls` times in a flow, one task run after the other
+
+    Returns:
+        Tuple[List[float], float]: the latency of every task run and the
+            total seconds, flow run creation excluded
+    """
+
+    @flow
+    def benchmark_flow():
+        """Run the task runs one after the other and time them"""
+        latencies = []
+        start = time.perf_counter()
+        for i in range(calls):
+            call_start = time.perf_counter()
+            task(client=client, **task_kwargs(i))
+            latencies.append(time.perf_counter() - call_start)
+        return latencies, time.perf_counter() - start
+
+    return benchmark_flow()
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render the results as a table"""
+    lines = [
+        f"{'operation':<10}{'variant':<26}{'calls':>7}{'ops/s':>10}"
+        f"{'p50 ms':>10}{'p99 ms':>10}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['operation']:<10}{result['variant']:<26}{result['calls']:>7}"
+            f"{result['ops_per_s']:>10.1f}{result['p50_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """Return the scenarios whose throughput dropped below their baseline
+
+    Args:
+        results (List[Dict[str, Any]]): the results of this run
+        baseline (List[Dict[str, Any]]): the results of a previous run
+        tolerance (float): the drop allowed, e.g. 0.2 for 20%
+
+    Returns:
+        List[str]: a description of every regression
+    """
+    previous = {(r["operation"], r["variant"]): r["ops_per_s"] for r in baseline}
+    regressions = []
+    for result in results:
+        expected = previous.get((result["operation"], result["variant"]))
+        if expected and result["ops_per_s"] < expected * (1 - tolerance):
+            regressions.append(
+                f"{result['operation']} / {result['variant']}: "
+                f"{result['ops_per_s']:.1f} ops/s, {expected:.1f} in the baseline"
+            )
+    return regressions
+
+
+def _result(
+    operation: str, variant: str, latencies: List[float], seconds: float
+) -> Dict[str, Any]:
+    """Summarize the latencies of a scenario"""
+    latencies = sorted(latencies)
+    return {
+        "operation": operation,
+        "variant": variant,
+        "calls": len(latencies),
+        "seconds": seconds,
+        "ops_per_s": len(latencies) / seconds,
+        "p50_ms": _percentile(latencies, 0.5) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Return the value under which a fraction `q` of the values fall"""
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,83 @@
-from . import _version
-from .blocks import OvhcloudBlock  # noqa
+import importlib
 
-__version__ = _version.get_versions()["version"]
+# the blocks are imported eagerly: Prefect loads the collection to register
+# their types before loading a block document, e.g. the infrastructure of a
+# deployment, and their modules only import the SDK and boto3 when used
+from .blocks import OvhcloudBlock, OvhcloudCredentials  # noqa
+from .object_storage import OvhcloudObjectStorage  # noqa
+
+try:
+    from .infrastructure import OvhcloudAITrainingJob  # noqa
+except ImportError:
+    # Prefect 3 removed the infrastructure blocks, accessing the block then
+    # raises the import error through `__getattr__`
+    pass
+
+# the tasks, flows and client are imported on first access, so processes
+# only using the blocks do not import every endpoint and model of the SDK
+_LAZY_ATTRIBUTES = {
+    "OvhcloudAITrainingJob": "infrastructure",
+    "OvhAIClient": "api",
+    "ClientHandle": "client",
+    "use_client": "client",
+    "hello_world": "flows",
+    "create_a_first_job": "flows",
+    "collect_job_outputs": "object_storage",
+    "sync_dataset": "object_storage",
+    **{
+        name: "tasks"
+        for name in (
+            "create_client",
+            "hello_prefect_ovh",
+            "create_a_job",
+            "get_infos_of_job",
+            "get_logs_of_job",
+            "start_an_existing_job",
+            "stop_an_existing_job",
+            "get_new_logs_of_job",
+            "mirror_logs_of_job",
+            "list_jobs",
+            "wait_for_job_state",
+            "create_jobs_bulk",
+            "hello_prefect_ovh_async",
+            "create_a_job_async",
+            "get_infos_of_job_async",
+            "get_logs_of_job_async",
+            "start_an_existing_job_async",
+            "stop_an_existing_job_async",
+            "get_new_logs_of_job_async",
+            "mirror_logs_of_job_async",
+            "list_jobs_async",
+            "wait_for_job_state_async",
+            "create_jobs_bulk_async",
+        )
+    },
+}
+
+__all__ = [
+    "OvhcloudBlock",
+    "OvhcloudCredentials",
+    "OvhcloudObjectStorage",
+    *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    # in a source checkout, versioneer runs git to compute the version, so it
+    # is only resolved when asked for instead of on every import
+    if name == "__version__":
+        from . import _version
+
+        version = _version.get_versions()["version"]
+        globals()["__version__"] = version
+        return version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_ATTRIBUTES, "__version__"})
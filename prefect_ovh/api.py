@@ -0,0 +1,590 @@
+"""Plain client of the OVHcloud AI Training API, wrapped by the tasks"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+import httpx
+from ov_hcloud_ai_solution_client import AuthenticatedClient
+from ov_hcloud_ai_solution_client.api.job import (
+    job_get,
+    job_kill,
+    job_log,
+    job_new,
+    job_start,
+)
+from ov_hcloud_ai_solution_client.api.me import me
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from ov_hcloud_ai_solution_client.models import Job, JobSpec, Me
+from ov_hcloud_ai_solution_client.types import Response
+from prefect.exceptions import MissingContextError
+from prefect.logging import get_logger, get_run_logger
+
+from prefect_ovh.cache import get_job_cache
+from prefect_ovh.client import (
+    DEFAULT_BASE_URL,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    ClientHandle,
+    acall_api,
+    call_api,
+    client_key,
+    get_pooled_client,
+    resolve_client,
+)
+from prefect_ovh.jobs import (
+    DEFAULT_PAGE_SIZE,
+    JOB_TERMINAL_STATES,
+    iter_jobs,
+    iter_jobs_async,
+    job_state,
+)
+from prefect_ovh.logs import tail_job_logs, tail_job_logs_async
+
+
+class OvhAIClient:
+    """Calls the AI Training API without creating task runs
+
+    The tasks of `prefect_ovh.tasks` are thin wrappers of these methods, which
+    return the same results. Call them directly in tight loops, e.g. to poll a
+    job thousands of times, so that the Prefect backend only records the task
+    or flow run around the loop.
+
+    Args:
+        client (Union[AuthenticatedClient, ClientHandle]): an authenticated
+            client, e.g. the one of `create_client`, or a `ClientHandle`; by
+            default the client set by `use_client`
+
+    Example:
+        Poll a job from a long running watcher:
+        ```python
+        from prefect_ovh.api import OvhAIClient
+        ovh = OvhAIClient.from_token("TOKEN")
+        for id_job in job_ids:
+            print(ovh.get_job(id_job, as_model=True).status.state)
+        ```
+    """
+
+    def __init__(
+        self, client: Optional[Union[AuthenticatedClient, ClientHandle]] = None
+    ):
+        self.client = resolve_client(client)
+
+    @classmethod
+    def from_token(
+        cls,
+        token: str,
+        base_url: str = DEFAULT_BASE_URL,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    ) -> "OvhAIClient":
+        """Build a client on the pooled client of a token, see `get_pooled_client`
+
+        Args:
+            token (str): the OVHcloud AI token
+            base_url (str): the url of the AI Training API of your region
+            max_connections (int): the maximum number of concurrent connections
+            max_keepalive_connections (int): the number of idle connections kept
+            keepalive_expiry (float): seconds before an idle connection is closed
+
+        Returns:
+            OvhAIClient: the client
+        """
+        return cls(
+            get_pooled_client(
+                token=token,
+                base_url=base_url,
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            )
+        )
+
+    def me(self, as_model: bool = False) -> Union[str, Me]:
+        """Return the infos of the user of the token
+
+        Args:
+            as_model (bool): return the `Me` model parsed by the SDK instead of json
+                (an error response then raises `UnexpectedStatus`)
+
+        Returns:
+            Union[str, Me]: the infos of the user
+        """
+        return _result(call_api(me, self.client), as_model)
+
+    def create_job(
+        self, spec: Union[dict, JobSpec], as_model: bool = False
+    ) -> Union[str, Job]:
+        """Submit a job
+
+        Args:
+            spec (Union[dict, JobSpec]): the JobSpec, as a model or a dict in the
+                API format
+            as_model (bool): return the `Job` model parsed by the SDK instead of json
+                (an error response then raises `UnexpectedStatus`)
+
+        Returns:
+            Union[str, Job]: the created job
+        """
+        response = call_api(job_new, self.client, json_body=_as_job_spec(spec))
+        return _result(response, as_model)
+
+    def get_job(
+        self, id_job: str, as_model: bool = False, use_cache: bool = True
+    ) -> Union[str, Job]:
+        """Return the infos of a job, from the job cache if they are fresh
+
+        Args:
+            id_job (str): the id of the job
+            as_model (bool): return the `Job` model parsed by the SDK instead of json
+                (an error response then raises `UnexpectedStatus`)
+            use_cache (bool): whether a cached response can be returned
+
+        Returns:
+            Union[str, Job]: the infos of the job
+        """
+        return _result(_get_job(id_job, self.client, use_cache), as_model)
+
+    def get_logs(self, id_job: str) -> str:
+        """Return the whole logs of a job
+
+        Args:
+            id_job (str): the id of the job
+
+        Returns:
+            str: the logs
+        """
+        return call_api(job_log, self.client, id=id_job).content.decode()
+
+    def get_new_logs(self, id_job: str) -> str:
+        """Return the complete lines of the logs added since the previous call
+
+        Args:
+            id_job (str): the id of the job
+
+        Returns:
+            str: the new lines
+        """
+        return "\n".join(self.tail_logs(id_job, follow=False))
+
+    def tail_logs(
+        self,
+        id_job: str,
+        follow: bool = True,
+        poll_interval: float = 5,
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Yield the new lines of the logs of a job, see `tail_job_logs`
+
+        Args:
+            id_job (str): the id of the job
+            follow (bool): keep polling until the job is over
+            poll_interval (float): the seconds between two polls
+            timeout (float): the maximum seconds to follow the job
+
+        Yields:
+            str: the lines of the logs
+        """
+        return tail_job_logs(
+            id_job, self.client, follow, poll_interval, timeout=timeout
+        )
+
+    def start_job(self, id_job: str, as_model: bool = False) -> Union[str, Job]:
+        """Start a job in interrupted or done state
+
+        Args:
+            id_job (str): the id of the job
+            as_model (bool): return the `Job` model parsed by the SDK instead of json
+                (an error response then raises `UnexpectedStatus`)
+
+        Returns:
+            Union[str, Job]: the infos of the job
+        """
+        response = call_api(job_start, self.client, id=id_job)
+        get_job_cache().invalidate(_job_key(id_job, self.client))
+        return _result(response, as_model)
+
+    def kill_job(self, id_job: str, as_model: bool = False) -> Union[str, Job]:
+        """Stop a job
+
+        Args:
+            id_job (str): the id of the job
+            as_model (bool): return the `Job` model parsed by the SDK instead of json
+                (an error response then raises `UnexpectedStatus`)
+
+        Returns:
+            Union[str, Job]: the infos of the job
+        """
+        response = call_api(job_kill, self.client, id=id_job)
+        get_job_cache().invalidate(_job_key(id_job, self.client))
+        return _result(response, as_model)
+
+    def iter_jobs(
+        self,
+        labels: Optional[Dict[str, str]] = None,
+        state: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[Job]:
+        """Yield the jobs matching some filters, a page at a time, see `iter_jobs`
+
+        Args:
+            labels (Dict[str, str]): only the jobs having all these labels
+            state (str): only the jobs in this state, e.g. `RUNNING`
+            updated_after (datetime): only the jobs updated after this date
+            page_size (int): the number of jobs fetched per request
+
+        Yields:
+            Job: the jobs
+        """
+        return iter_jobs(self.client, labels, state, updated_after, page_size)
+
+    def list_jobs(
+        self,
+        labels: Optional[Dict[str, str]] = None,
+        state: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        limit: Optional[int] = None,
+        as_model: bool = False,
+    ) -> List[Union[dict, Job]]:
+        """List the jobs matching some filters
+
+        Args:
+            labels (Dict[str, str]): only the jobs having all these labels
+            state (str): only the jobs in this state, e.g. `RUNNING`
+            updated_after (datetime): only the jobs updated after this date
+            page_size (int): the number of jobs fetched per request
+            limit (int): the maximum number of jobs returned
+            as_model (bool): return the `Job` models instead of dicts
+
+        Returns:
+            List[Union[dict, Job]]: the jobs
+        """
+        jobs = self.iter_jobs(labels, state, updated_after, page_size)
+        return [job if as_model else job.to_dict() for job in islice(jobs, limit)]
+
+    def wait_for_job_state(
+        self,
+        id_job: str,
+        target_states: Iterable[str] = JOB_TERMINAL_STATES,
+        timeout: float = 600,
+        poll_interval: float = 1,
+        max_poll_interval: float = 30,
+    ) -> dict:
+        """Wait until a job reaches one of the given states
+
+        The job is polled with an exponential backoff plus jitter, starting at
+        `poll_interval` seconds and doubling up to `max_poll_interval`.
+
+        Args:
+            id_job (str): the id of the job
+            target_states (Iterable[str]): the states to wait for
+            timeout (float): the maximum number of seconds to wait
+            poll_interval (float): the first delay between two polls in seconds
+            max_poll_interval (float): the maximum delay between two polls
+
+        Failed polls are retried when they are throttled, hit a server error
+        or a network error, any other error is raised at once.
+
+        Raises:
+            TimeoutError: if the job is not in a target state after `timeout`
+            UnexpectedStatus: if the job cannot be read, e.g. it does not exist
+
+        Returns:
+            dict: the reached `state`, the `elapsed` seconds, the `transitions`
+                observed as `(state, seconds since the start)` pairs and the
+                last `job` infos in json
+        """
+        watcher = _JobStateWatcher(id_job, target_states, timeout)
+        delays = _backoff_delays(poll_interval, max_poll_interval)
+        while True:
+            try:
+                response = _get_job(id_job, self.client, use_cache=False)
+            except httpx.TransportError as exc:
+                response = exc
+            if watcher.update(response):
+                return watcher.result()
+            time.sleep(watcher.next_delay(delays))
+
+    def create_jobs(
+        self, specs: List[Union[dict, JobSpec]], max_concurrency: int = 10
+    ) -> List[dict]:
+        """Submit many jobs from at most `max_concurrency` threads
+
+        Args:
+            specs (List[Union[dict, JobSpec]]): the JobSpec of each job
+            max_concurrency (int): the maximum number of submissions in flight
+
+        Returns:
+            List[dict]: one result per spec, in the order of `specs`, with the
+                `status_code`, the created `job` in json and the `error` if any
+        """
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(self._submit_job, specs))
+
+    async def me_async(self, as_model: bool = False) -> Union[str, Me]:
+        """Async version of `me`"""
+        return _result(await acall_api(me, self.client), as_model)
+
+    async def create_job_async(
+        self, spec: Union[dict, JobSpec], as_model: bool = False
+    ) -> Union[str, Job]:
+        """Async version of `create_job`"""
+        response = await acall_api(job_new, self.client, json_body=_as_job_spec(spec))
+        return _result(response, as_model)
+
+    async def get_job_async(
+        self, id_job: str, as_model: bool = False, use_cache: bool = True
+    ) -> Union[str, Job]:
+        """Async version of `get_job`"""
+        return _result(await _get_job_async(id_job, self.client, use_cache), as_model)
+
+    async def get_logs_async(self, id_job: str) -> str:
+        """Async version of `get_logs`"""
+        response = await acall_api(job_log, self.client, id=id_job)
+        return response.content.decode()
+
+    async def get_new_logs_async(self, id_job: str) -> str:
+        """Async version of `get_new_logs`"""
+        lines = [line async for line in self.tail_logs_async(id_job, follow=False)]
+        return "\n".join(lines)
+
+    def tail_logs_async(
+        self,
+        id_job: str,
+        follow: bool = True,
+        poll_interval: float = 5,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Async version of `tail_logs`"""
+        return tail_job_logs_async(
+            id_job, self.client, follow, poll_interval, timeout=timeout
+        )
+
+    async def start_job_async(
+        self, id_job: str, as_model: bool = False
+    ) -> Union[str, Job]:
+        """Async version of `start_job`"""
+        response = await acall_api(job_start, self.client, id=id_job)
+        get_job_cache().invalidate(_job_key(id_job, self.client))
+        return _result(response, as_model)
+
+    async def kill_job_async(
+        self, id_job: str, as_model: bool = False
+    ) -> Union[str, Job]:
+        """Async version of `kill_job`"""
+        response = await acall_api(job_kill, self.client, id=id_job)
+        get_job_cache().invalidate(_job_key(id_job, self.client))
+        return _result(response, as_model)
+
+    def iter_jobs_async(
+        self,
+        labels: Optional[Dict[str, str]] = None,
+        state: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Job]:
+        """Async version of `iter_jobs`"""
+        return iter_jobs_async(self.client, labels, state, updated_after, page_size)
+
+    async def list_jobs_async(
+        self,
+        labels: Optional[Dict[str, str]] = None,
+        state: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        limit: Optional[int] = None,
+        as_model: bool = False,
+    ) -> List[Union[dict, Job]]:
+        """Async version of `list_jobs`"""
+        jobs = []
+        async for job in self.iter_jobs_async(labels, state, updated_after, page_size):
+            if limit is not None and len(jobs) >= limit:
+                break
+            jobs.append(job if as_model else job.to_dict())
+        return jobs
+
+    async def wait_for_job_state_async(
+        self,
+        id_job: str,
+        target_states: Iterable[str] = JOB_TERMINAL_STATES,
+        timeout: float = 600,
+        poll_interval: float = 1,
+        max_poll_interval: float = 30,
+    ) -> dict:
+        """Async version of `wait_for_job_state`"""
+        watcher = _JobStateWatcher(id_job, target_states, timeout)
+        delays = _backoff_delays(poll_interval, max_poll_interval)
+        while True:
+            try:
+                response = await _get_job_async(id_job, self.client, use_cache=False)
+            except httpx.TransportError as exc:
+                response = exc
+            if watcher.update(response):
+                return watcher.result()
+            await asyncio.sleep(watcher.next_delay(delays))
+
+    async def create_jobs_async(
+        self, specs: List[Union[dict, JobSpec]], max_concurrency: int = 10
+    ) -> List[dict]:
+        """Async version of `create_jobs`, with a semaphore instead of threads"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def submit(spec):
+            """Submit a job once a slot of the semaphore is free"""
+            async with semaphore:
+                try:
+                    response = await acall_api(
+                        job_new, self.client, json_body=_as_job_spec(spec)
+                    )
+                except Exception as exc:
+                    return _bulk_result(error=exc)
+                return _bulk_result(response=response)
+
+        return list(await asyncio.gather(*(submit(spec) for spec in specs)))
+
+    def _submit_job(self, spec: Union[dict, JobSpec]) -> dict:
+        """Submit one job of `create_jobs` and turn any failure in a result"""
+        try:
+            response = call_api(job_new, self.client, json_body=_as_job_spec(spec))
+        except Exception as exc:
+            return _bulk_result(error=exc)
+        return _bulk_result(response=response)
+
+
+def _job_key(id_job: str, client) -> tuple:
+    """Return the key of a job in the job cache"""
+    return (*client_key(client), id_job)
+
+
+def _get_job(id_job: str, client, use_cache: bool = True) -> Response[Job]:
+    """Call job_get through the job cache
+
+    A fresh response is always stored in the cache, even when `use_cache`
+    prevents reading from it.
+    """
+    cache = get_job_cache()
+    key = _job_key(id_job, client)
+    response = cache.get(key) if use_cache else None
+    if response is None:
+        response = call_api(job_get, client, id=id_job)
+        cache.put(key, response)
+    return response
+
+
+async def _get_job_async(id_job: str, client, use_cache: bool = True) -> Response[Job]:
+    """Async version of `_get_job`"""
+    cache = get_job_cache()
+    key = _job_key(id_job, client)
+    response = cache.get(key) if use_cache else None
+    if response is None:
+        response = await acall_api(job_get, client, id=id_job)
+        cache.put(key, response)
+    return response
+
+
+def _result(response: Response, as_model: bool) -> Union[str, Job, Me]:
+    """Return the model already parsed by the SDK or the json of a response
+
+    An error response has no model, so asking for one raises UnexpectedStatus
+    rather than returning None; the json keeps returning the error body.
+    """
+    if not as_model:
+        return response.content.decode()
+    if not 200 <= response.status_code < 300 or response.parsed is None:
+        raise UnexpectedStatus(response.status_code, response.content)
+    return response.parsed
+
+
+def _as_job_spec(spec: Union[dict, JobSpec]) -> JobSpec:
+    """Accept the specs as models or as dicts"""
+    return spec if isinstance(spec, JobSpec) else JobSpec.from_dict(spec)
+
+
+def _bulk_result(response: Response[Job] = None, error: Exception = None) -> dict:
+    """Describe the outcome of one submission of the bulk methods"""
+    if response is None:
+        return {"status_code": None, "job": None, "error": repr(error)}
+    content = response.content.decode()
+    if 200 <= response.status_code < 300:
+        return {"status_code": int(response.status_code), "job": content, "error": None}
+    return {"status_code": int(response.status_code), "job": None, "error": content}
+
+
+class _JobStateWatcher:
+    """Follows the state of a job across the polls of `wait_for_job_state`"""
+
+    def __init__(self, id_job: str, target_states: Iterable[str], timeout: float):
+        self.id_job = id_job
+        self.target_states = set(target_states)
+        self.deadline = time.monotonic() + timeout
+        self.start = time.monotonic()
+        self.state = None
+        self.job = None
+        self.transitions = []
+        self.logger = _logger()
+
+    def update(self, response: Union[Response[Job], httpx.TransportError]) -> bool:
+        """Record a polled job and tell whether a target state is reached
+
+        A transient failure, i.e. a network error, a 429 or a 5xx, is ignored
+        so that the next poll retries until the deadline; `job_state` raises
+        on the other errors.
+        """
+        if isinstance(response, httpx.TransportError):
+            self.logger.debug("Polling job %s failed: %r", self.id_job, response)
+            return False
+        state = job_state(response)
+        if state is None:
+            self.logger.debug(
+                "Polling job %s failed with %s", self.id_job, response.status_code
+            )
+            return False
+        self.job = response.content.decode()
+        if state != self.state:
+            elapsed = time.monotonic() - self.start
+            self.logger.info("Job %s is %s after %.1fs", self.id_job, state, elapsed)
+            self.transitions.append((state, elapsed))
+            self.state = state
+        return state in self.target_states
+
+    def next_delay(self, delays: Iterator[float]) -> float:
+        """Return the delay before the next poll, bounded by the deadline"""
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                f"Job {self.id_job} is still {self.state}, expected one of "
+                f"{sorted(self.target_states)}"
+            )
+        return min(next(delays), remaining)
+
+    def result(self) -> dict:
+        """Return the outcome reported by the waiting methods"""
+        return {
+            "state": self.state,
+            "elapsed": time.monotonic() - self.start,
+            "transitions": self.transitions,
+            "job": self.job,
+        }
+
+
+def _backoff_delays(initial: float, maximum: float) -> Iterator[float]:
+    """Yield exponentially growing delays with a +/- 50% jitter"""
+    delay = initial
+    while True:
+        yield min(delay * random.uniform(0.5, 1.5), maximum)
+        delay = min(delay * 2, maximum)
+
+
+def _logger():
+    """Return the logger of the current run, or of the package outside runs"""
+    try:
+        return get_run_logger()
+    except MissingContextError:
+        return get_logger("prefect_ovh")
@@ -1,7 +1,27 @@
 """This is an example blocks module"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
 
+from ov_hcloud_ai_solution_client import AuthenticatedClient
 from prefect.blocks.core import Block
-from pydantic import Field
+from prefect.utilities.asyncutils import sync_compatible
+from pydantic import Field, SecretStr
+
+from prefect_ovh.client import (
+    BASE_URL_TEMPLATE,
+    DEFAULT_BASE_URL,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    get_pooled_client,
+)
+
+# Seconds an `OvhcloudCredentials.load_cached` block is reused
+DEFAULT_LOAD_TTL = 60.0
+
+_loaded_blocks: Dict[Tuple[type, str], Tuple[float, Block]] = {}
+_loaded_blocks_lock = threading.Lock()
 
 
 class OvhcloudBlock(Block):
@@ -33,3 +53,112 @@ class OvhcloudBlock(Block):
         """
         block = cls(value="A sample value")
         block.save("sample-block", overwrite=True)
+
+
+class OvhcloudCredentials(Block):
+    """
+    Credentials and connection settings of the OVHcloud AI Training API.
+
+    Attributes:
+        token (SecretStr): The OVHcloud AI token.
+        region (str): The region of the API, e.g. `bhs`, replacing `base_url`.
+        base_url (str): The url of the AI Training API of your region.
+        timeout (float): The seconds before a request times out.
+        max_connections (int): The maximum number of concurrent connections.
+        max_keepalive_connections (int): The number of idle connections kept.
+        keepalive_expiry (float): The seconds before an idle connection is closed.
+
+    Example:
+        Load stored credentials and call the tasks with their client:
+        ```python
+        from prefect_ovh import OvhcloudCredentials, use_client
+        from prefect_ovh.tasks import get_infos_of_job
+        credentials = OvhcloudCredentials.load("BLOCK_NAME")
+        with use_client(credentials):
+            get_infos_of_job(job_id)
+        ```
+    """
+
+    _block_type_name = "OVHcloud Credentials"
+    # replace this with a relevant logo; defaults to Prefect logo
+    _logo_url = "https://images.ctfassets.net/gm98wzqotmnx/08yCE6xpJMX9Kjl5VArDS/c2ede674c20f90b9b6edeab71feffac9/prefect-200x200.png?h=250"  # noqa
+    _documentation_url = "https://Victor2103.github.io/prefect-OVHcloud/blocks/#prefect-OVHcloud.blocks.OvhcloudCredentials"  # noqa
+
+    token: SecretStr = Field(default=..., description="The OVHcloud AI token.")
+    region: Optional[str] = Field(
+        default=None,
+        description="The region of the API, e.g. `bhs`, replacing `base_url`.",
+    )
+    base_url: str = Field(
+        default=DEFAULT_BASE_URL,
+        description="The url of the AI Training API of your region.",
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        description="The seconds before a request times out, none if not set.",
+    )
+    max_connections: int = Field(
+        default=DEFAULT_MAX_CONNECTIONS,
+        description="The maximum number of concurrent connections.",
+    )
+    max_keepalive_connections: int = Field(
+        default=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        description="The number of idle connections kept open.",
+    )
+    keepalive_expiry: float = Field(
+        default=DEFAULT_KEEPALIVE_EXPIRY,
+        description="The seconds before an idle connection is closed.",
+    )
+
+    @property
+    def api_url(self) -> str:
+        """The url of the API, from `region` if it is set"""
+        if self.region:
+            return BASE_URL_TEMPLATE.format(region=self.region)
+        return self.base_url
+
+    def get_client(self) -> AuthenticatedClient:
+        """Return the pooled client of these credentials
+
+        The client is the process-wide one of the token and the url, see
+        `prefect_ovh.client.get_pooled_client`, so every call and every block
+        with the same credentials reuses its open connections.
+
+        Returns:
+            AuthenticatedClient: the shared client
+        """
+        return get_pooled_client(
+            token=self.token.get_secret_value(),
+            base_url=self.api_url,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            timeout=self.timeout,
+        )
+
+    @classmethod
+    @sync_compatible
+    async def load_cached(
+        cls, name: str, ttl: float = DEFAULT_LOAD_TTL
+    ) -> "OvhcloudCredentials":
+        """Load a block, reusing the one loaded less than `ttl` seconds ago
+
+        Hot flows loading their credentials on every run then only read the
+        block document from the Prefect API once per `ttl`.
+
+        Args:
+            name (str): the name of the block
+            ttl (float): the seconds a loaded block is reused
+
+        Returns:
+            OvhcloudCredentials: the block
+        """
+        key = (cls, name)
+        with _loaded_blocks_lock:
+            expires, block = _loaded_blocks.get(key, (0, None))
+        if block is not None and time.monotonic() < expires:
+            return block
+        block = await cls.load(name)
+        with _loaded_blocks_lock:
+            _loaded_blocks[key] = (time.monotonic() + ttl, block)
+        return block
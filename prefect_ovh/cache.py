@@ -0,0 +1,123 @@
+"""Process-wide cache of the infos of AI Training jobs"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from ov_hcloud_ai_solution_client.types import Response
+
+from prefect_ovh.jobs import JOB_TERMINAL_STATES, job_state
+
+DEFAULT_TTL = 5.0
+DEFAULT_MAXSIZE = 1024
+
+
+class JobCache:
+    """A LRU cache of job_get responses expiring after a time to live
+
+    Jobs in a terminal state do not change anymore, so their responses never
+    expire; they can still be evicted when the cache is full. Starting or
+    killing a job must `invalidate` it since it leaves its terminal state.
+
+    Args:
+        ttl (float): the seconds during which a response is served from cache
+        maxsize (int): the maximum number of jobs kept
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, maxsize: int = DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Response]:
+        """Return the cached response of a job if it is still fresh
+
+        Args:
+            key (Hashable): the key of the job
+
+        Returns:
+            Optional[Response]: the response, None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, response: Response) -> None:
+        """Cache a successful job_get response
+
+        Args:
+            key (Hashable): the key of the job
+            response (Response): the response of job_get
+        """
+        if response.status_code != 200:
+            return
+        if job_state(response) in JOB_TERMINAL_STATES:
+            expires = None
+        else:
+            expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (response, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget the response of a job
+
+        Args:
+            key (Hashable): the key of the job
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every response and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the `hits`, `misses` and `size` of the cache"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self) -> int:
+        """Return the number of jobs cached, fresh or expired"""
+        return len(self._entries)
+
+
+_job_cache = JobCache()
+
+
+def get_job_cache() -> JobCache:
+    """Return the job cache shared by the tasks of the process"""
+    return _job_cache
+
+
+def configure_job_cache(
+    ttl: float = DEFAULT_TTL, maxsize: int = DEFAULT_MAXSIZE
+) -> JobCache:
+    """Replace the job cache shared by the tasks of the process
+
+    Args:
+        ttl (float): the seconds during which a response is served from cache
+        maxsize (int): the maximum number of jobs kept
+
+    Returns:
+        JobCache: the new cache
+    """
+    global _job_cache
+    _job_cache = JobCache(ttl=ttl, maxsize=maxsize)
+    return _job_cache
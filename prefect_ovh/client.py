@@ -0,0 +1,540 @@
+"""Pooled OVHcloud AI Training clients shared across task runs"""
+import asyncio
+import atexit
+import contextvars
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from http import HTTPStatus
+from types import ModuleType
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import attrs
+import httpx
+from ov_hcloud_ai_solution_client import AuthenticatedClient
+from ov_hcloud_ai_solution_client.types import Response
+
+from prefect_ovh.metrics import ApiCall, get_api_metrics
+from prefect_ovh.rate_limit import get_rate_limiter, parse_retry_after
+from prefect_ovh.single_flight import SingleFlight, get_async_single_flight
+from prefect_ovh.tracing import api_span, set_call_result
+
+BASE_URL_TEMPLATE = "https://{region}.training.ai.cloud.ovh.net"
+DEFAULT_BASE_URL = BASE_URL_TEMPLATE.format(region="gra")
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_MAX_RETRIES = 5
+# Read-only endpoints whose concurrent identical calls share one request
+COALESCED_ENDPOINTS = frozenset({"job_get", "job_log", "me"})
+
+# keyed by the token, the base url and every setting of the connection pool
+_clients: Dict[tuple, AuthenticatedClient] = {}
+_clients_lock = threading.Lock()
+# httpx async pools are bound to the event loop they were first used on, so the
+# async clients are kept per running loop and dropped with it
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_flight = SingleFlight()
+# the client of the tasks called without one, see `use_client`
+_current_client: contextvars.ContextVar = contextvars.ContextVar(
+    "prefect_ovh_client", default=None
+)
+# the size of the body of the last request of the running call, see `_count_sent`
+_sent_bytes: contextvars.ContextVar = contextvars.ContextVar(
+    "prefect_ovh_sent_bytes", default=None
+)
+
+
+def get_pooled_client(
+    token: str,
+    base_url: str = DEFAULT_BASE_URL,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    timeout: Optional[float] = None,
+) -> AuthenticatedClient:
+    """Return the process-wide client for a token, a base url and pool settings
+
+    The client keeps its connection pool open between calls so that every
+    request after the first one reuses a kept-alive TLS connection. Clients are
+    created on first use and closed by `close_pooled_clients` at interpreter
+    shutdown. Callers asking for other pool limits or another timeout get a
+    client of their own, they still share the rate limiter of the account.
+
+    Args:
+        token (str): the OVHcloud AI token
+        base_url (str): the url of the AI Training API of your region
+        max_connections (int): the maximum number of concurrent connections
+        max_keepalive_connections (int): the number of idle connections kept open
+        keepalive_expiry (float): seconds before an idle connection is closed
+        timeout (float): seconds before a request times out, none if not set
+
+    Returns:
+        AuthenticatedClient: the shared client
+    """
+    key = (
+        token,
+        base_url,
+        max_connections,
+        max_keepalive_connections,
+        keepalive_expiry,
+        timeout,
+    )
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _new_client(
+                token,
+                base_url,
+                max_connections,
+                max_keepalive_connections,
+                keepalive_expiry,
+                timeout,
+            )
+            _clients[key] = client
+    return client
+
+
+class ClientHandle:
+    """A picklable reference to a pooled client, resolved where it is used
+
+    A live `AuthenticatedClient` holds connection pools that can't be shipped
+    to the workers of a distributed task runner such as Dask or Ray. Pass a
+    handle to the tasks instead: it only holds the settings of the client and
+    `get_client` returns the pooled client of the process running the task.
+
+    The token can be read on the worker from the environment variable
+    `token_env`, so that it is not pickled with the handle.
+
+    Args:
+        token (str): the OVHcloud AI token
+        token_env (str): the environment variable holding the token, instead
+            of `token`
+        base_url (str): the url of the AI Training API of your region
+        region (str): the region of the API, e.g. `bhs`, instead of `base_url`
+        max_connections (int): the maximum number of concurrent connections
+        max_keepalive_connections (int): the number of idle connections kept open
+        keepalive_expiry (float): seconds before an idle connection is closed
+
+    Example:
+        Spread job submissions over a Dask cluster:
+        ```python
+        from prefect import flow
+        from prefect_dask import DaskTaskRunner
+        from prefect_ovh.client import ClientHandle
+        from prefect_ovh.tasks import create_a_job
+
+        @flow(task_runner=DaskTaskRunner())
+        def submit_jobs(images):
+            client = ClientHandle(token_env="OVH_AI_TOKEN")
+            for image in images:
+                create_a_job.submit(client, image=image)
+        ```
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        token_env: Optional[str] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        region: Optional[str] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    ):
+        if (token is None) == (token_env is None):
+            raise ValueError("Pass either `token` or `token_env`")
+        self.token = token
+        self.token_env = token_env
+        self.base_url = BASE_URL_TEMPLATE.format(region=region) if region else base_url
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+
+    def get_client(self) -> AuthenticatedClient:
+        """Return the pooled client of this process, see `get_pooled_client`
+
+        Raises:
+            KeyError: if the environment variable `token_env` is not set
+
+        Returns:
+            AuthenticatedClient: the shared client
+        """
+        return get_pooled_client(
+            token=self.token if self.token_env is None else os.environ[self.token_env],
+            base_url=self.base_url,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def __repr__(self) -> str:
+        """Show the handle without its token"""
+        token = f"token_env={self.token_env!r}" if self.token_env else "token='***'"
+        return f"ClientHandle({token}, base_url={self.base_url!r})"
+
+
+@contextmanager
+def use_client(
+    client: Union[AuthenticatedClient, ClientHandle]
+) -> Iterator[Union[AuthenticatedClient, ClientHandle]]:
+    """Set the client of the tasks called without one in this context
+
+    The client is kept in a context variable, which Prefect copies to the task
+    runs of the flow. The task runs then only carry their small inputs, e.g.
+    the id of a job, instead of a client that Prefect would have to walk
+    through and record on every call.
+
+    Args:
+        client (Union[AuthenticatedClient, ClientHandle]): a client, a handle
+            or an `OvhcloudCredentials` block
+
+    Yields:
+        Union[AuthenticatedClient, ClientHandle]: the client
+
+    Example:
+        Poll a job without passing the client to every task:
+        ```python
+        @flow
+        def watch(job_id):
+            with use_client(OvhcloudCredentials.load_cached("BLOCK_NAME")):
+                while get_infos_of_job(job_id, as_model=True).status.state != "DONE":
+                    time.sleep(10)
+        ```
+    """
+    token = _current_client.set(client)
+    try:
+        yield client
+    finally:
+        _current_client.reset(token)
+
+
+def resolve_client(
+    client: Optional[Union[AuthenticatedClient, ClientHandle]] = None
+) -> AuthenticatedClient:
+    """Return the client of a handle or a block, the client itself or the current one
+
+    Args:
+        client (Union[AuthenticatedClient, ClientHandle]): a client, a handle, an
+            `OvhcloudCredentials` block or None for the client set by `use_client`
+
+    Raises:
+        RuntimeError: if no client is given nor set by `use_client`
+
+    Returns:
+        AuthenticatedClient: the client to call the API with
+    """
+    if client is None:
+        client = _current_client.get()
+        if client is None:
+            raise RuntimeError(
+                "No OVHcloud AI client was given and none is set by `use_client`"
+            )
+    if isinstance(client, AuthenticatedClient):
+        return client
+    # a ClientHandle or an OvhcloudCredentials block
+    return client.get_client()
+
+
+def get_async_pooled_client(
+    token: str,
+    base_url: str = DEFAULT_BASE_URL,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+) -> AuthenticatedClient:
+    """Return the client shared by the coroutines of the running event loop
+
+    Same as `get_pooled_client` for the `asyncio_detailed` endpoints: every
+    coroutine of the loop using the same token, base url and pool limits goes
+    through one async connection pool. Must be called from a coroutine.
+
+    Args:
+        token (str): the OVHcloud AI token
+        base_url (str): the url of the AI Training API of your region
+        max_connections (int): the maximum number of concurrent connections
+        max_keepalive_connections (int): the number of idle connections kept open
+        keepalive_expiry (float): seconds before an idle connection is closed
+
+    Returns:
+        AuthenticatedClient: the shared client of the running loop
+    """
+    return get_async_client_for(
+        get_pooled_client(
+            token=token,
+            base_url=base_url,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+    )
+
+
+def get_async_client_for(client: AuthenticatedClient) -> AuthenticatedClient:
+    """Return the async twin of a client for the running event loop
+
+    The twin has the same settings as `client` and its own async connection
+    pool, shared by every coroutine of the loop. This lets the async tasks
+    accept the client returned by `create_client`.
+
+    Args:
+        client (AuthenticatedClient): any client of the SDK
+
+    Returns:
+        AuthenticatedClient: the shared client of the running loop
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        # the client is kept next to its twin so that its id is never reused
+        _, async_client = clients.get(id(client), (client, None))
+        if async_client is None:
+            async_client = attrs.evolve(client)
+            clients[id(client)] = (client, async_client)
+    return async_client
+
+
+def call_api(
+    endpoint: ModuleType,
+    client: AuthenticatedClient,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **kwargs: Any,
+) -> Response:
+    """Call an endpoint of the SDK through the rate limiter of the client
+
+    Throttled requests are retried up to `max_retries` times, after the delay
+    asked by the `Retry-After` header of the response. Concurrent identical
+    calls of the read-only endpoints in `COALESCED_ENDPOINTS` share a single
+    request and its response. The latency, status, retries and sizes of every
+    call are recorded in `get_api_metrics()`, and traced in an OpenTelemetry
+    span when it is installed.
+
+    Args:
+        endpoint (ModuleType): the endpoint module of the SDK, e.g. `job_get`
+        client (AuthenticatedClient): an authenticated client
+        max_retries (int): the number of retries of a throttled request
+        **kwargs: the arguments of the endpoint
+
+    Returns:
+        Response: the response of the endpoint, still throttled if every retry
+            was
+    """
+    key = _coalescing_key(endpoint, client, kwargs)
+    if key is None:
+        return _call_api(endpoint, client, max_retries, kwargs)
+    return _flight.do(key, lambda: _call_api(endpoint, client, max_retries, kwargs))
+
+
+async def acall_api(
+    endpoint: ModuleType,
+    client: AuthenticatedClient,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **kwargs: Any,
+) -> Response:
+    """Async version of `call_api`, going through the async pool of the client
+
+    Args:
+        endpoint (ModuleType): the endpoint module of the SDK, e.g. `job_get`
+        client (AuthenticatedClient): an authenticated client
+        max_retries (int): the number of retries of a throttled request
+        **kwargs: the arguments of the endpoint
+
+    Returns:
+        Response: the response of the endpoint
+    """
+    key = _coalescing_key(endpoint, client, kwargs)
+    if key is None:
+        return await _acall_api(endpoint, client, max_retries, kwargs)
+    return await get_async_single_flight().do(
+        key, lambda: _acall_api(endpoint, client, max_retries, kwargs)
+    )
+
+
+def close_pooled_clients() -> None:
+    """Close every pooled client and their connections
+
+    This is registered to run at interpreter shutdown; calling it earlier is
+    safe, the next `get_pooled_client` call opens a new pool.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.get_httpx_client().close()
+
+
+async def close_async_pooled_clients() -> None:
+    """Close the async pooled clients of the running event loop"""
+    with _clients_lock:
+        clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+    for _, client in clients:
+        await client.get_async_httpx_client().aclose()
+
+
+def _new_client(
+    token: str,
+    base_url: str,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    timeout: Optional[float] = None,
+) -> AuthenticatedClient:
+    """Build a client whose connection pool has the given limits"""
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return AuthenticatedClient(
+        base_url=base_url,
+        token=token,
+        timeout=httpx.Timeout(timeout) if timeout is not None else None,
+        httpx_args={"limits": limits},
+    )
+
+
+atexit.register(close_pooled_clients)
+
+
+def client_key(client: AuthenticatedClient) -> Tuple[str, str]:
+    """Return the token and the base url identifying the account of a client
+
+    Args:
+        client (AuthenticatedClient): any client of the SDK
+
+    Returns:
+        Tuple[str, str]: the token and the base url of the client
+    """
+    # attrs stores the `base_url` init argument in the private `_base_url`
+    return client.token, client._base_url
+
+
+def _call_api(
+    endpoint: ModuleType,
+    client: AuthenticatedClient,
+    max_retries: int,
+    kwargs: Dict[str, Any],
+) -> Response:
+    """Send a request of `call_api`, retrying it while it is throttled"""
+    limiter = _rate_limiter_for(client)
+    _hook_sent_bytes(client.get_httpx_client(), _count_sent)
+    sent = _sent_bytes.set([0])
+    retries = 0
+    response = None
+    start = time.perf_counter()
+    with api_span(_endpoint_name(endpoint), kwargs) as span:
+        try:
+            while True:
+                limiter.acquire()
+                response = endpoint.sync_detailed(client=client, **kwargs)
+                if response.status_code != HTTPStatus.TOO_MANY_REQUESTS:
+                    limiter.on_success()
+                    return response
+                if retries >= max_retries:
+                    return response
+                limiter.on_throttled(parse_retry_after(response.headers))
+                retries += 1
+        finally:
+            set_call_result(span, response, retries)
+            _record_call(endpoint, response, retries, start)
+            _sent_bytes.reset(sent)
+
+
+async def _acall_api(
+    endpoint: ModuleType,
+    client: AuthenticatedClient,
+    max_retries: int,
+    kwargs: Dict[str, Any],
+) -> Response:
+    """Async version of `_call_api`"""
+    limiter = _rate_limiter_for(client)
+    async_client = get_async_client_for(client)
+    _hook_sent_bytes(async_client.get_async_httpx_client(), _acount_sent)
+    sent = _sent_bytes.set([0])
+    retries = 0
+    response = None
+    start = time.perf_counter()
+    with api_span(_endpoint_name(endpoint), kwargs) as span:
+        try:
+            while True:
+                await limiter.acquire_async()
+                response = await endpoint.asyncio_detailed(
+                    client=async_client, **kwargs
+                )
+                if response.status_code != HTTPStatus.TOO_MANY_REQUESTS:
+                    limiter.on_success()
+                    return response
+                if retries >= max_retries:
+                    return response
+                limiter.on_throttled(parse_retry_after(response.headers))
+                retries += 1
+        finally:
+            set_call_result(span, response, retries)
+            _record_call(endpoint, response, retries, start)
+            _sent_bytes.reset(sent)
+
+
+def _hook_sent_bytes(httpx_client, hook) -> None:
+    """Add the hook measuring the sent bodies to an httpx client, once"""
+    if hook in httpx_client.event_hooks["request"]:
+        return
+    with _clients_lock:
+        hooks = httpx_client.event_hooks
+        if hook not in hooks["request"]:
+            httpx_client.event_hooks = {
+                **hooks,
+                "request": [*hooks["request"], hook],
+            }
+
+
+def _count_sent(request: httpx.Request) -> None:
+    """Request hook keeping the size of the body sent by the running call"""
+    sent = _sent_bytes.get()
+    if sent is not None:
+        sent[0] = len(request.content)
+
+
+async def _acount_sent(request: httpx.Request) -> None:
+    """Async version of `_count_sent`"""
+    _count_sent(request)
+
+
+def _record_call(
+    endpoint: ModuleType,
+    response: Optional[Response],
+    retries: int,
+    start: float,
+) -> None:
+    """Record a call in the API metrics, with a status of 0 if it raised"""
+    get_api_metrics().record(
+        ApiCall(
+            endpoint=_endpoint_name(endpoint),
+            status_code=int(response.status_code) if response is not None else 0,
+            latency=time.perf_counter() - start,
+            retries=retries,
+            bytes_in=len(response.content) if response is not None else 0,
+            bytes_out=_sent_bytes.get()[0],
+        )
+    )
+
+
+def _endpoint_name(endpoint: ModuleType) -> str:
+    """Return the name of an endpoint module of the SDK, e.g. `job_get`"""
+    return endpoint.__name__.rsplit(".", 1)[-1]
+
+
+def _coalescing_key(
+    endpoint: ModuleType, client: AuthenticatedClient, kwargs: Dict[str, Any]
+) -> Optional[tuple]:
+    """Return the key identifying identical calls, None if they can't be shared"""
+    name = _endpoint_name(endpoint)
+    if name not in COALESCED_ENDPOINTS:
+        return None
+    return (*client_key(client), name, tuple(sorted(kwargs.items())))
+
+
+def _rate_limiter_for(client: AuthenticatedClient):
+    """Return the rate limiter of the token and region of a client"""
+    return get_rate_limiter(*client_key(client))
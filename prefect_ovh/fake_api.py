@@ -0,0 +1,453 @@
+"""A local stand-in of the OVHcloud AI Training API, for tests and benchmarks"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from prefect_ovh.jobs import JOB_TERMINAL_STATES
+
+# The states a job goes through, with the seconds it spends in each of them
+DEFAULT_STATE_DURATIONS = (
+    ("QUEUED", 0.1),
+    ("INITIALIZING", 0.1),
+    ("PENDING", 0.1),
+    ("RUNNING", 1.0),
+)
+
+
+class FakeJob:
+    """A job of the fake API, whose state only depends on the time elapsed
+
+    The job goes through the states of `state_durations` from the time it was
+    started, then ends in `final_state`. Killing it moves it to INTERRUPTING
+    then INTERRUPTED after `interrupt_duration` seconds.
+
+    Attributes:
+        id (str): the id of the job
+        spec (Dict[str, Any]): the JobSpec it was submitted with
+        final_state (str): DONE, or FAILED for a failing job
+    """
+
+    def __init__(
+        self,
+        spec: Dict[str, Any],
+        state_durations: Tuple[Tuple[str, float], ...],
+        final_state: str = "DONE",
+        interrupt_duration: float = 0.1,
+        log_interval: float = 0.1,
+    ):
+        self.id = str(uuid.uuid4())
+        self.spec = spec
+        self.final_state = final_state
+        self.state_durations = state_durations
+        self.interrupt_duration = interrupt_duration
+        self.log_interval = log_interval
+        self.created_at = time.time()
+        self.started_at = self.created_at
+        self.killed_at: Optional[float] = None
+
+    def timeline(self, now: float) -> Tuple[str, float]:
+        """Return the state of the job at `now` and the time it entered it"""
+        if self.killed_at is not None:
+            if now - self.killed_at < self.interrupt_duration:
+                return "INTERRUPTING", self.killed_at
+            return "INTERRUPTED", self.killed_at + self.interrupt_duration
+        entered = self.started_at
+        for state, duration in self.state_durations:
+            if now < entered + duration:
+                return state, entered
+            entered += duration
+        return self.final_state, entered
+
+    def running_since(self, now: float) -> Optional[float]:
+        """Return the time the job started running, None if it did not yet"""
+        entered = self.started_at
+        for state, duration in self.state_durations:
+            if state == "RUNNING":
+                if self.killed_at is not None and self.killed_at < entered:
+                    return None
+                return entered if now >= entered else None
+            entered += duration
+        return None
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        """Return the job in the format of the API"""
+        state, entered = self.timeline(now)
+        status: Dict[str, Any] = {"state": state}
+        if state == "RUNNING":
+            status["url"] = f"https://{self.id}.job.gra.training.ai.cloud.ovh.net"
+        if state in ("DONE", "FAILED"):
+            status["exitCode"] = 0 if state == "DONE" else 1
+        return {
+            "id": self.id,
+            "createdAt": _isoformat(self.created_at),
+            "updatedAt": _isoformat(entered),
+            "user": "fake-user",
+            "spec": self.spec,
+            "status": status,
+        }
+
+    def logs(self, now: float) -> str:
+        """Return the log of the job, a line every `log_interval` running seconds"""
+        running_since = self.running_since(now)
+        if running_since is None:
+            return ""
+        state, _ = self.timeline(now)
+        if self.killed_at is not None:
+            running = min(now, self.killed_at) - running_since
+        elif state == "RUNNING":
+            running = now - running_since
+        else:
+            running = dict(self.state_durations)["RUNNING"]
+        # rounded, float errors would drop the last line, e.g. 0.3 / 0.05 < 6
+        count = max(0, int(round(running / self.log_interval, 6)))
+        return "".join(
+            f"{_isoformat(running_since + i * self.log_interval)} "
+            f"[{self.id}] line {i}\n"
+            for i in range(count)
+        )
+
+    def kill(self, now: float) -> None:
+        """Interrupt the job unless it already ended"""
+        state, _ = self.timeline(now)
+        if self.killed_at is None and state not in ("DONE", "FAILED"):
+            self.killed_at = now
+
+    def start(self, now: float) -> None:
+        """Restart the job from the queue"""
+        self.started_at = now
+        self.killed_at = None
+
+
+class FakeAITrainingAPI:
+    """Serves the job and me endpoints of the AI Training API from memory
+
+    The server listens on a local port from a background thread, so the
+    tasks reach it through `create_client(token, base_url=api.url)` exactly
+    like the real API. Every request can be slowed down by `latency`, throttled
+    above `rate_limit` requests per second with a 429 and its `Retry-After`,
+    or fail with a 503 with a probability of `error_rate`. Jobs fail with a
+    probability of `job_failure_rate`.
+
+    Args:
+        token (str): the token the requests must bear, any if not set
+        latency (float): the seconds added to every request
+        rate_limit (float): the requests per second served before throttling,
+            unlimited if not set
+        error_rate (float): the probability of a request failing with a 503
+        job_failure_rate (float): the probability of a job ending FAILED
+        state_durations (Tuple[Tuple[str, float], ...]): the states of the jobs
+            and the seconds they spend in each of them
+        log_interval (float): the running seconds between two log lines
+        seed (int): the seed of the simulated failures
+        host (str): the address to listen on
+        port (int): the port to listen on, a free one by default
+
+    Attributes:
+        jobs (Dict[str, FakeJob]): the jobs submitted, by id
+        request_counts (Dict[str, int]): the requests served per endpoint
+
+    Example:
+        Run a flow against the fake API:
+        ```python
+        with FakeAITrainingAPI(latency=0.01) as api:
+            client = create_client(token="token", base_url=api.url)
+            job = create_a_job(client, image="ubuntu", command=["true"])
+        ```
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        error_rate: float = 0.0,
+        job_failure_rate: float = 0.0,
+        state_durations: Tuple[Tuple[str, float], ...] = DEFAULT_STATE_DURATIONS,
+        log_interval: float = 0.1,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.token = token
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.job_failure_rate = job_failure_rate
+        self.state_durations = tuple(state_durations)
+        self.log_interval = log_interval
+        self.jobs: Dict[str, FakeJob] = {}
+        self.request_counts: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit or 0.0
+        self._refilled = time.monotonic()
+        self._server = _Server((host, port), _handler_for(self))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The base url of the server, to pass to `create_client`"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAITrainingAPI":
+        """Serve the requests from a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the port"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeAITrainingAPI":
+        """Start serving"""
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop serving"""
+        self.stop()
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, List[str]],
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Serve a request
+
+        Args:
+            method (str): the HTTP method
+            path (str): the path of the url
+            query (Dict[str, List[str]]): the parsed query string
+            headers (Dict[str, str]): the headers of the request
+            body (bytes): the body of the request
+
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: the status, the headers and the
+                body of the response
+        """
+        endpoint, job_id = _route(method, path)
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.token is not None and headers.get("Authorization") != (
+            f"Bearer {self.token}"
+        ):
+            return _json(401, {"message": "Invalid token"})
+        retry_after = self._throttle()
+        if retry_after is not None:
+            return _json(
+                429,
+                {"message": "Too many requests"},
+                {"Retry-After": f"{retry_after:.3f}"},
+            )
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            return _json(503, {"message": "Service unavailable"})
+        if endpoint == "not_found":
+            return _json(404, {"message": "Not found"})
+        return getattr(self, f"_{endpoint}")(job_id, query, body)
+
+    def _throttle(self) -> Optional[float]:
+        """Take a token of the rate limit, return the seconds to wait if none"""
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit,
+                self._tokens + (now - self._refilled) * self.rate_limit,
+            )
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate_limit
+
+    def _job_new(self, job_id, query, body):
+        """Create a job from its spec, failing it at `job_failure_rate`"""
+        spec = json.loads(body or b"{}")
+        if not spec.get("image"):
+            return _json(400, {"message": "The image of the job is required"})
+        with self._lock:
+            failing = self._random.random() < self.job_failure_rate
+            job = FakeJob(
+                spec,
+                self.state_durations,
+                final_state="FAILED" if failing else "DONE",
+                log_interval=self.log_interval,
+            )
+            self.jobs[job.id] = job
+        return _json(200, job.to_dict(time.time()))
+
+    def _job_get(self, job_id, query, body):
+        """Return a job with its current state"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return _json(404, {"message": f"Job {job_id} not found"})
+        return _json(200, job.to_dict(time.time()))
+
+    def _job_log(self, job_id, query, body):
+        """Return the whole log of a job written so far"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return _json(404, {"message": f"Job {job_id} not found"})
+        content = job.logs(time.time()).encode()
+        return 200, {"Content-Type": "text/plain"}, content
+
+    def _job_kill(self, job_id, query, body):
+        """Interrupt a job"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return _json(404, {"message": f"Job {job_id} not found"})
+        now = time.time()
+        with self._lock:
+            job.kill(now)
+        return _json(200, job.to_dict(now))
+
+    def _job_start(self, job_id, query, body):
+        """Start again a job in a terminal state"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return _json(404, {"message": f"Job {job_id} not found"})
+        now = time.time()
+        state, _ = job.timeline(now)
+        if state not in JOB_TERMINAL_STATES:
+            return _json(409, {"message": f"Job {job_id} is {state}"})
+        with self._lock:
+            job.start(now)
+        return _json(200, job.to_dict(now))
+
+    def _job_list(self, job_id, query, body):
+        """Return a page of the jobs matching the filters of the query"""
+        now = time.time()
+        with self._lock:
+            jobs = [job.to_dict(now) for job in self.jobs.values()]
+        labels = query.get("labelSelector", [""])[0]
+        for selector in filter(None, labels.split(",")):
+            key, _, value = selector.partition("=")
+            jobs = [
+                job for job in jobs if job["spec"].get("labels", {}).get(key) == value
+            ]
+        if "statusState" in query:
+            states = query["statusState"]
+            jobs = [job for job in jobs if job["status"]["state"] in states]
+        if "updatedAfter" in query:
+            updated_after = query["updatedAfter"][0]
+            jobs = [
+                job
+                for job in jobs
+                if _parse_datetime(job["updatedAt"]) > _parse_datetime(updated_after)
+            ]
+        page = int(query.get("page", ["1"])[0])
+        size = int(query.get("size", ["100"])[0])
+        return _json(200, jobs[(page - 1) * size : page * size])
+
+    def _me(self, job_id, query, body):
+        """Return the fake user"""
+        return _json(200, {"user": "fake-user", "tenant": "fake-tenant"})
+
+
+_ROUTES = (
+    ("POST", re.compile(r"/v1/job"), "job_new"),
+    ("GET", re.compile(r"/v1/job"), "job_list"),
+    ("GET", re.compile(r"/v1/job/([^/]+)"), "job_get"),
+    ("GET", re.compile(r"/v1/job/([^/]+)/log"), "job_log"),
+    ("PUT", re.compile(r"/v1/job/([^/]+)/kill"), "job_kill"),
+    ("PUT", re.compile(r"/v1/job/([^/]+)/start"), "job_start"),
+    ("GET", re.compile(r"/v1/info"), "me"),
+)
+
+
+def _route(method: str, path: str) -> Tuple[str, Optional[str]]:
+    """Return the endpoint of a request and the id of its job"""
+    for route_method, pattern, endpoint in _ROUTES:
+        match = pattern.fullmatch(path.rstrip("/"))
+        if route_method == method and match:
+            return endpoint, match.group(1) if match.groups() else None
+    return "not_found", None
+
+
+class _Server(ThreadingHTTPServer):
+    """A threading server accepting the bursts of connections of benchmarks"""
+
+    daemon_threads = True
+    # with the default backlog of 5, connections beyond it wait for a SYN retry
+    request_queue_size = 1024
+
+
+def _handler_for(api: FakeAITrainingAPI):
+    """Build the request handler class serving `api`"""
+
+    class Handler(BaseHTTPRequestHandler):
+        """Forwards every request to `api.handle`"""
+
+        # keep connections alive so that pooled clients behave as with the API
+        protocol_version = "HTTP/1.1"
+        # the headers and the body are sent apart, which Nagle would delay
+        disable_nagle_algorithm = True
+
+        def _serve(self):
+            """Answer the request with the response of the fake API"""
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, headers, content = api.handle(
+                self.command, url.path, parse_qs(url.query), dict(self.headers), body
+            )
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PUT = _serve
+
+        def log_message(self, format, *args):
+            """Keep the requests out of stderr"""
+
+    return Handler
+
+
+def _json(
+    status: int, content: Any, headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Build a json response"""
+    return (
+        status,
+        {"Content-Type": "application/json", **(headers or {})},
+        json.dumps(content).encode(),
+    )
+
+
+def _isoformat(timestamp: float) -> str:
+    """Format a timestamp as the API does"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse a datetime of the API, naive ones being in UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -1,7 +1,4 @@
 """This is an example flows module"""
-import json
-import time
-
 from prefect import flow
 
 from prefect_ovh.tasks import (
@@ -12,6 +9,7 @@ from prefect_ovh.tasks import (
     hello_prefect_ovh,
     start_an_existing_job,
     stop_an_existing_job,
+    wait_for_job_state,
 )
 
 
@@ -46,7 +44,7 @@ def create_a_first_job(
     Returns:
         The response when calling job infos
     """
-    # Create a client for job creation
+    # Create a client, it is reused by every following task
     client = create_client(token=token)
     # Define the parameter to put in the job creation
     image = "bash"
@@ -59,8 +57,8 @@ def create_a_first_job(
     gpu = 1
     sshPublicKeys = []
     volumes = []
-    # Launch the task create a job
-    response = create_a_job(
+    # Launch the task create a job, getting back the Job model of the SDK
+    job = create_a_job(
         client=client,
         image=image,
         http_port=http_port,
@@ -72,31 +70,23 @@ def create_a_first_job(
         gpu=gpu,
         sshPublicKeys=sshPublicKeys,
         volumes=volumes,
+        as_model=True,
     )
     # You can run the task with only the image as a parameter
-    # response = create_a_job(client=client,image=image)
-    response = json.loads(response)
+    # job = create_a_job(client=client,image=image,as_model=True)
     # Get the id
-    id = response["id"]
-    # Create a new client to get the infos of the job
-    client = create_client(token=token)
+    id = job.id
     # Make a new call to the api
     result = get_infos_of_job(id_job=id, client=client)
     print("Here is your job created : \n", result)
-    # Create a new client for the job's logs
-    client = create_client(token=token)
     # Get the logs of the job
     result = get_logs_of_job(id_job=id, client=client)
     print("Here are your logs \n", result)
-    # Create a new client
-    client = create_client(token=token)
     # Stop the job
     result = stop_an_existing_job(id_job=id, client=client)
     print("Here is your job stopped : \n", result)
-    # Create a new client
-    client = create_client(token=token)
-    # Whait that your job is really stopped
-    time.sleep(60)
+    # Wait until your job is really stopped
+    wait_for_job_state(id_job=id, client=client, target_states=["INTERRUPTED"])
     # Restart the job
     result = start_an_existing_job(id_job=id, client=client)
     # Return this dict of the flow
@@ -0,0 +1,266 @@
+"""Run Prefect flow runs as OVHcloud AI Training jobs"""
+import asyncio
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+import anyio.abc
+from prefect.exceptions import InfrastructureNotFound
+from prefect.infrastructure.base import Infrastructure, InfrastructureResult
+from prefect.utilities.dockerutils import get_prefect_image_name
+from pydantic import Field, SecretStr
+from typing_extensions import Literal
+
+from prefect_ovh.client import DEFAULT_BASE_URL, acall_api, get_pooled_client
+
+
+class OvhcloudAITrainingJobResult(InfrastructureResult):
+    """Contains information about the final state of a completed AI Training job"""
+
+
+class OvhcloudAITrainingJob(Infrastructure):
+    """
+    Runs a command as an OVHcloud AI Training job.
+
+    Flow runs are submitted as jobs built from `job_spec`, the other fields
+    overriding its image, resources, command, environment and labels. The
+    image must contain Prefect and the code of your flows. The block waits
+    for the job to end, streaming its logs, and reports its exit code.
+
+    Attributes:
+        token (SecretStr): The OVHcloud AI token used to submit the jobs.
+        base_url (str): The url of the AI Training API of your region.
+        image (str): The image of the job.
+        cpu (int): The number of CPUs of the job, replacing the GPUs if set.
+        gpu (int): The number of GPUs of the job.
+        volumes (List[Dict[str, Any]]): The volumes mounted in the job.
+        job_spec (Dict[str, Any]): A JobSpec template in the API format.
+        stream_output (bool): Whether to print the logs of the job.
+        poll_interval (float): The seconds between two polls of the job.
+        job_watch_timeout_seconds (int): The seconds to wait for the job to
+            end before killing it, forever if not set.
+
+    Example:
+        Run a deployment on a GPU of OVHcloud AI Training:
+        ```python
+        from prefect_ovh import OvhcloudAITrainingJob
+        ovhcloud_ai_training_job = OvhcloudAITrainingJob.load("BLOCK_NAME")
+        ```
+    """
+
+    _block_type_name = "OVHcloud AI Training Job"
+    _logo_url = "https://images.ctfassets.net/gm98wzqotmnx/08yCE6xpJMX9Kjl5VArDS/c2ede674c20f90b9b6edeab71feffac9/prefect-200x200.png?h=250"  # noqa
+    _documentation_url = "https://Victor2103.github.io/prefect-OVHcloud/infrastructure/#prefect_ovh.infrastructure.OvhcloudAITrainingJob"  # noqa
+
+    type: Literal["ovhcloud-ai-training-job"] = Field(
+        default="ovhcloud-ai-training-job", description="The slug for this task type."
+    )
+    token: SecretStr = Field(
+        default=..., description="The OVHcloud AI token used to submit the jobs."
+    )
+    base_url: str = Field(
+        default=DEFAULT_BASE_URL,
+        description="The url of the AI Training API of your region.",
+    )
+    image: str = Field(
+        default_factory=get_prefect_image_name,
+        description="The image of the job, it must contain Prefect and your flows.",
+    )
+    cpu: int = Field(
+        default=0, description="The number of CPUs of the job, replacing the GPUs."
+    )
+    gpu: int = Field(default=1, description="The number of GPUs of the job.")
+    volumes: List[Dict[str, Any]] = Field(
+        default_factory=list, description="The volumes mounted in the job."
+    )
+    job_spec: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="A JobSpec template in the API format, e.g. to set a flavor.",
+    )
+    stream_output: bool = Field(
+        default=True, description="Whether to print the logs of the job."
+    )
+    poll_interval: float = Field(
+        default=10, description="The seconds between two polls of the job."
+    )
+    job_watch_timeout_seconds: Optional[int] = Field(
+        default=None,
+        description="The seconds to wait for the job to end, forever if not set.",
+    )
+
+    async def run(
+        self, task_status: Optional[anyio.abc.TaskStatus] = None
+    ) -> OvhcloudAITrainingJobResult:
+        """Submit the job and wait for it to end
+
+        Args:
+            task_status (anyio.abc.TaskStatus): notified with the id of the job
+                once it is submitted
+
+        Raises:
+            TimeoutError: if the job is not over after
+                `job_watch_timeout_seconds`, the job is then killed
+            UnexpectedStatus: if the job cannot be read anymore, e.g. the
+                token was revoked
+
+        Returns:
+            OvhcloudAITrainingJobResult: the id and the exit code of the job
+        """
+        # the SDK endpoints and models are only imported by the flow runs
+        # submitting jobs, not by every process loading the collection
+        from ov_hcloud_ai_solution_client.api.job import job_new
+        from ov_hcloud_ai_solution_client.models import JobSpec
+
+        client = self._get_client()
+        response = await acall_api(
+            job_new, client, json_body=JobSpec.from_dict(self.build_job_spec())
+        )
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Failed to submit the AI Training job: {response.content.decode()}"
+            )
+        job_id = json.loads(response.content)["id"]
+        self.logger.info(f"Submitted AI Training job {job_id!r}")
+        if task_status is not None:
+            task_status.started(job_id)
+
+        try:
+            with anyio.fail_after(self.job_watch_timeout_seconds):
+                job = await self._watch_job(job_id)
+        except (TimeoutError, anyio.get_cancelled_exc_class()):
+            # the job would keep running, and billing, without a flow run
+            self.logger.warning(f"Killing AI Training job {job_id!r}")
+            with anyio.CancelScope(shield=True):
+                await self._kill_quietly(job_id)
+            raise
+        status = job["status"]
+        return OvhcloudAITrainingJobResult(
+            identifier=job_id, status_code=self._exit_code(status)
+        )
+
+    async def kill(self, infrastructure_pid: str, grace_seconds: int = 30) -> None:
+        """Stop a job submitted by this block
+
+        Args:
+            infrastructure_pid (str): the id of the job
+            grace_seconds (int): unused, AI Training interrupts the job itself
+
+        Raises:
+            InfrastructureNotFound: if the job does not exist
+        """
+        from ov_hcloud_ai_solution_client.api.job import job_kill
+
+        response = await acall_api(job_kill, self._get_client(), id=infrastructure_pid)
+        if response.status_code == 404:
+            raise InfrastructureNotFound(
+                f"Unable to kill AI Training job {infrastructure_pid!r}: "
+                "the job was not found."
+            )
+
+    async def _kill_quietly(self, job_id: str) -> None:
+        """Kill a job while an error is raised, logging the failures"""
+        try:
+            await self.kill(job_id)
+        except Exception as exc:
+            self.logger.error(f"Failed to kill AI Training job {job_id!r}: {exc!r}")
+
+    def preview(self) -> str:
+        """Return the JobSpec that would be submitted"""
+        return json.dumps(self.build_job_spec(), indent=2)
+
+    def build_job_spec(self) -> Dict[str, Any]:
+        """Merge the fields of the block into the JobSpec template
+
+        Returns:
+            Dict[str, Any]: the JobSpec in the API format
+        """
+        spec = dict(self.job_spec)
+        spec["image"] = self.image
+        spec["command"] = self.command or self._base_flow_run_command()
+        if self.cpu:
+            spec["resources"] = {**spec.get("resources", {}), "cpu": self.cpu, "gpu": 0}
+        else:
+            spec["resources"] = {**spec.get("resources", {}), "gpu": self.gpu}
+        spec["envVars"] = spec.get("envVars", []) + [
+            {"name": key, "value": value}
+            for key, value in self._get_environment_variables().items()
+        ]
+        spec["labels"] = {
+            **spec.get("labels", {}),
+            **{_slugify(key): _slugify(value) for key, value in self.labels.items()},
+        }
+        if self.name:
+            spec["name"] = _slugify(self.name)
+        spec["volumes"] = spec.get("volumes", []) + self.volumes
+        return spec
+
+    async def _watch_job(self, job_id: str) -> Dict[str, Any]:
+        """Wait for the job to end, streaming its logs, and return its infos
+
+        The logs are printed while the state of the job is polled, each new
+        state being logged.
+        """
+        client = self._get_client()
+        # a plain task rather than a task group, whose exception groups would
+        # hide the errors raised by the polls
+        logs = None
+        if self.stream_output:
+            logs = asyncio.ensure_future(self._stream_logs(job_id, client))
+        try:
+            job = await self._poll_job(job_id, client)
+            if logs is not None:
+                # the end of the logs is printed once the job is over
+                await logs
+        finally:
+            if logs is not None and not logs.done():
+                logs.cancel()
+        return job
+
+    async def _poll_job(self, job_id: str, client) -> Dict[str, Any]:
+        """Poll a job until it is over, logging its state changes"""
+        from ov_hcloud_ai_solution_client.api.job import job_get
+
+        from prefect_ovh.jobs import JOB_TERMINAL_STATES, job_state
+
+        state = None
+        while True:
+            response = await acall_api(job_get, client, id=job_id)
+            # job_state is None on a transient failure, e.g. a 503, which is
+            # retried, and raises on the others, e.g. a 404 or a 401
+            new_state = job_state(response)
+            if new_state is not None and new_state != state:
+                state = new_state
+                self.logger.info(f"AI Training job {job_id!r} is {state}")
+            if state in JOB_TERMINAL_STATES:
+                return json.loads(response.content)
+            await anyio.sleep(self.poll_interval)
+
+    async def _stream_logs(self, job_id: str, client) -> None:
+        """Print the logs of a job until it is over"""
+        from prefect_ovh.logs import tail_job_logs_async
+
+        async for line in tail_job_logs_async(
+            job_id, client, poll_interval=self.poll_interval
+        ):
+            print(line, file=sys.stderr)
+
+    def _exit_code(self, status: Dict[str, Any]) -> int:
+        """Map the final status of a job onto the exit code of the flow run"""
+        if "exitCode" in status:
+            return status["exitCode"]
+        return 0 if status["state"] == "DONE" else 1
+
+    def _get_client(self):
+        """Return the pooled client of the block"""
+        return get_pooled_client(self.token.get_secret_value(), self.base_url)
+
+    def _get_environment_variables(self) -> Dict[str, str]:
+        """Return the environment of the flow run, without unset variables"""
+        env = {**self._base_environment(), **self.env}
+        return {key: value for key, value in env.items() if value is not None}
+
+
+def _slugify(value: str) -> str:
+    """Keep the characters AI Training accepts in job names and labels"""
+    return re.sub(r"[^a-zA-Z0-9_.-]", "-", str(value))[:63]
@@ -0,0 +1,149 @@
+"""Helpers about AI Training jobs"""
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from ov_hcloud_ai_solution_client import AuthenticatedClient
+from ov_hcloud_ai_solution_client.api.job import job_list
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from ov_hcloud_ai_solution_client.models import Job
+from ov_hcloud_ai_solution_client.types import Response
+
+from prefect_ovh.client import acall_api, call_api
+
+# States after which a job no longer changes until it is started again
+JOB_TERMINAL_STATES = ("INTERRUPTED", "DONE", "FAILED", "ERROR", "TIMEOUT")
+DEFAULT_PAGE_SIZE = 100
+
+
+def is_transient(status_code: int) -> bool:
+    """Whether a failed call can succeed when made again
+
+    Args:
+        status_code (int): the status of the response
+
+    Returns:
+        bool: True for a throttled call or a server error
+    """
+    return status_code == 429 or status_code >= 500
+
+
+def job_state(response: Response[Job]) -> Optional[str]:
+    """Return the state of a job from a job_get response
+
+    The state is read from the model parsed by the SDK, so the body is not
+    decoded again.
+
+    Args:
+        response (Response[Job]): the response of job_get
+
+    Raises:
+        UnexpectedStatus: if the call failed for good, e.g. with a 404 for an
+            unknown job or a 401 for a revoked token
+
+    Returns:
+        Optional[str]: the state of the job, e.g. `RUNNING`, None if the call
+            failed transiently, e.g. with a 503
+    """
+    if not 200 <= response.status_code < 300:
+        if is_transient(response.status_code):
+            return None
+        raise UnexpectedStatus(response.status_code, response.content)
+    if response.parsed is None:
+        return None
+    return str(response.parsed.status.state)
+
+
+def iter_jobs(
+    client: AuthenticatedClient,
+    labels: Optional[Dict[str, str]] = None,
+    state: Optional[str] = None,
+    updated_after: Optional[datetime] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[Job]:
+    """Yield the jobs of the project, fetching them one page at a time
+
+    The filters are applied by the API, and only the current page is kept in
+    memory, however many jobs the project has. The listing ends on the first
+    empty page, since the API can serve pages smaller than `page_size`.
+
+    Args:
+        client (AuthenticatedClient): an authenticated client
+        labels (Dict[str, str]): only the jobs having all these labels
+        state (str): only the jobs in this state, e.g. `RUNNING`
+        updated_after (datetime): only the jobs updated after this date
+        page_size (int): the number of jobs fetched per request
+
+    Raises:
+        UnexpectedStatus: if the API does not return a page
+
+    Yields:
+        Job: every job matching the filters
+    """
+    filters = _list_filters(labels, state, updated_after)
+    page = 1
+    while True:
+        response = call_api(job_list, client, page=page, size=page_size, **filters)
+        jobs = _page_jobs(response)
+        if not jobs:
+            return
+        yield from jobs
+        page += 1
+
+
+async def iter_jobs_async(
+    client: AuthenticatedClient,
+    labels: Optional[Dict[str, str]] = None,
+    state: Optional[str] = None,
+    updated_after: Optional[datetime] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[Job]:
+    """Async version of `iter_jobs`
+
+    Args:
+        client (AuthenticatedClient): an authenticated client
+        labels (Dict[str, str]): only the jobs having all these labels
+        state (str): only the jobs in this state, e.g. `RUNNING`
+        updated_after (datetime): only the jobs updated after this date
+        page_size (int): the number of jobs fetched per request
+
+    Raises:
+        UnexpectedStatus: if the API does not return a page
+
+    Yields:
+        Job: every job matching the filters
+    """
+    filters = _list_filters(labels, state, updated_after)
+    page = 1
+    while True:
+        response = await acall_api(
+            job_list, client, page=page, size=page_size, **filters
+        )
+        jobs = _page_jobs(response)
+        if not jobs:
+            return
+        for job in jobs:
+            yield job
+        page += 1
+
+
+def _list_filters(
+    labels: Optional[Dict[str, str]],
+    state: Optional[str],
+    updated_after: Optional[datetime],
+) -> dict:
+    """Turn the filters of `iter_jobs` into the arguments of job_list"""
+    filters = {}
+    if labels:
+        filters["label_selector"] = ",".join(f"{k}={v}" for k, v in labels.items())
+    if state is not None:
+        filters["status_state"] = state
+    if updated_after is not None:
+        filters["updated_after"] = updated_after
+    return filters
+
+
+def _page_jobs(response: Response) -> list:
+    """Return the jobs of a job_list response"""
+    if response.status_code != 200:
+        raise UnexpectedStatus(response.status_code, response.content)
+    return response.parsed
@@ -0,0 +1,214 @@
+"""Incremental reading of the logs of AI Training jobs"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Hashable, Iterator, List, Optional
+
+from ov_hcloud_ai_solution_client import AuthenticatedClient
+from ov_hcloud_ai_solution_client.api.job import job_get, job_log
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from ov_hcloud_ai_solution_client.types import Response
+
+from prefect_ovh.client import acall_api, call_api, client_key
+from prefect_ovh.jobs import JOB_TERMINAL_STATES, is_transient, job_state
+
+# The number of tails kept, the least recently used ones are dropped first
+MAX_TAILS = 1024
+
+_tails: "OrderedDict[Hashable, JobLogTail]" = OrderedDict()
+_tails_lock = threading.Lock()
+
+
+class JobLogTail:
+    """Remembers how much of the log of a job was already read
+
+    The log endpoint always returns the whole log, so the tail keeps the byte
+    offset of what it has seen and only decodes what comes after it. A line is
+    returned once it is complete; the last incomplete line waits for the next
+    read or for `flush`.
+
+    Args:
+        id_job (str): the id of the job
+    """
+
+    def __init__(self, id_job: str):
+        self.id_job = id_job
+        self.offset = 0
+        self._partial = b""
+        self._lock = threading.Lock()
+
+    def feed(self, content: bytes) -> List[str]:
+        """Return the complete lines of a log that were not read yet
+
+        Args:
+            content (bytes): the whole log as returned by the API
+
+        Returns:
+            List[str]: the new lines, without their line breaks
+        """
+        with self._lock:
+            if len(content) < self.offset:
+                # the log is shorter than what we read: the job was restarted
+                self.offset = 0
+                self._partial = b""
+            data = self._partial + content[self.offset :]
+            self.offset = len(content)
+            *lines, self._partial = data.split(b"\n")
+        return [line.decode(errors="replace") for line in lines]
+
+    def flush(self) -> List[str]:
+        """Return the last incomplete line, once the job is over"""
+        with self._lock:
+            partial, self._partial = self._partial, b""
+        return [partial.decode(errors="replace")] if partial else []
+
+
+def _new_lines(tail: JobLogTail, response: Response) -> List[str]:
+    """Feed a job_log response to a tail, an error body is not part of the log
+
+    A transient failure is skipped, the next read returns the missed lines.
+    """
+    if response.status_code != 200:
+        if is_transient(response.status_code):
+            return []
+        raise UnexpectedStatus(response.status_code, response.content)
+    return tail.feed(response.content)
+
+
+def _tail_key(id_job: str, client: AuthenticatedClient) -> Hashable:
+    """Key the tails by account as well, job ids are only unique per project"""
+    return (*client_key(client), id_job)
+
+
+def get_log_tail(id_job: str, client: AuthenticatedClient) -> JobLogTail:
+    """Return the process-wide tail of a job, created on first use
+
+    At most `MAX_TAILS` tails are kept, the least recently used ones are
+    forgotten first.
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): the client reading the log
+
+    Returns:
+        JobLogTail: the tail of the job
+    """
+    key = _tail_key(id_job, client)
+    with _tails_lock:
+        tail = _tails.get(key)
+        if tail is None:
+            tail = _tails[key] = JobLogTail(id_job)
+            while len(_tails) > MAX_TAILS:
+                _tails.popitem(last=False)
+        _tails.move_to_end(key)
+    return tail
+
+
+def forget_log_tail(id_job: str, client: AuthenticatedClient) -> None:
+    """Drop the offset of a job so that its log is read again from the start
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): the client reading the log
+    """
+    with _tails_lock:
+        _tails.pop(_tail_key(id_job, client), None)
+
+
+def _check_deadline(id_job: str, deadline: Optional[float]) -> None:
+    """Raise once the deadline of a tail is over"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise TimeoutError(f"The logs of job {id_job} were still followed")
+
+
+def tail_job_logs(
+    id_job: str,
+    client: AuthenticatedClient,
+    follow: bool = True,
+    poll_interval: float = 5,
+    timeout: Optional[float] = None,
+) -> Iterator[str]:
+    """Yield the lines of the log of a job that were not read yet
+
+    Transient failures, i.e. 429s and 5xx, are retried at the next poll. Once
+    the job is over, its tail is forgotten.
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client
+        follow (bool): whether to keep polling until the job is over
+        poll_interval (float): the seconds between two polls when following
+        timeout (float): the maximum seconds to follow the job, forever if not
+            set
+
+    Raises:
+        UnexpectedStatus: if the job or its log cannot be read, e.g. the job
+            does not exist or the token was revoked
+        TimeoutError: if the job is not over after `timeout`
+
+    Yields:
+        str: every new line of the log
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    tail = get_log_tail(id_job, client)
+    while True:
+        yield from _new_lines(tail, call_api(job_log, client, id=id_job))
+        if not follow:
+            return
+        response = call_api(job_get, client, id=id_job)
+        if job_state(response) in JOB_TERMINAL_STATES:
+            response = call_api(job_log, client, id=id_job)
+            lines = _new_lines(tail, response)
+            # on a failed read the end of the log is read again on the next poll
+            if response.status_code == 200:
+                yield from lines + tail.flush()
+                forget_log_tail(id_job, client)
+                return
+        _check_deadline(id_job, deadline)
+        time.sleep(poll_interval)
+
+
+async def tail_job_logs_async(
+    id_job: str,
+    client: AuthenticatedClient,
+    follow: bool = True,
+    poll_interval: float = 5,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """Async version of `tail_job_logs`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client
+        follow (bool): whether to keep polling until the job is over
+        poll_interval (float): the seconds between two polls when following
+        timeout (float): the maximum seconds to follow the job, forever if not
+            set
+
+    Raises:
+        UnexpectedStatus: if the job or its log cannot be read
+        TimeoutError: if the job is not over after `timeout`
+
+    Yields:
+        str: every new line of the log
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    tail = get_log_tail(id_job, client)
+    while True:
+        for line in _new_lines(tail, await acall_api(job_log, client, id=id_job)):
+            yield line
+        if not follow:
+            return
+        response = await acall_api(job_get, client, id=id_job)
+        if job_state(response) in JOB_TERMINAL_STATES:
+            response = await acall_api(job_log, client, id=id_job)
+            lines = _new_lines(tail, response)
+            # on a failed read the end of the log is read again on the next poll
+            if response.status_code == 200:
+                for line in lines + tail.flush():
+                    yield line
+                forget_log_tail(id_job, client)
+                return
+        _check_deadline(id_job, deadline)
+        await asyncio.sleep(poll_interval)
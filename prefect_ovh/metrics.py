@@ -0,0 +1,315 @@
+"""Latency and payload metrics of the calls to the OVHcloud AI Training API"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Upper bounds in seconds of the latency buckets, as the Prometheus defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ApiCall:
+    """A call of the API, recorded once it returned
+
+    Attributes:
+        endpoint (str): the name of the endpoint, e.g. `job_get`
+        status_code (int): the status of the last response
+        latency (float): the seconds of the call, retries included
+        retries (int): the number of throttled requests retried
+        bytes_in (int): the size of the body of the last response
+        bytes_out (int): the size of the body of the last request
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        status_code: int,
+        latency: float,
+        retries: int = 0,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ):
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.latency = latency
+        self.retries = retries
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+
+    def __repr__(self) -> str:
+        """Show the endpoint, the status, the latency and the retries"""
+        return (
+            f"ApiCall(endpoint={self.endpoint!r}, status_code={self.status_code}, "
+            f"latency={self.latency:.3f}, retries={self.retries})"
+        )
+
+
+class Histogram:
+    """A cumulative histogram of the latencies of an endpoint
+
+    Args:
+        buckets (Sequence[float]): the sorted upper bounds of the buckets
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[int]:
+        """Return the number of values under each bound, then the total"""
+        counts, total = [], 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket holding it
+
+        Args:
+            q (float): the quantile, e.g. 0.99
+
+        Returns:
+            Optional[float]: the estimate, None without values or when the
+                quantile is over the last bound
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in zip(self.buckets, self.cumulative()):
+            if total >= rank:
+                return bound
+        return None
+
+
+class EndpointStats:
+    """The aggregated calls of an endpoint
+
+    Attributes:
+        latency (Histogram): the latencies of the calls
+        status_codes (Dict[int, int]): the number of calls per final status
+        retries (int): the number of throttled requests retried
+        bytes_in (int): the bytes received
+        bytes_out (int): the bytes sent
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.latency = Histogram(buckets)
+        self.status_codes: Dict[int, int] = {}
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def add(self, call: ApiCall) -> None:
+        """Aggregate a call"""
+        self.latency.observe(call.latency)
+        self.status_codes[call.status_code] = (
+            self.status_codes.get(call.status_code, 0) + 1
+        )
+        self.retries += call.retries
+        self.bytes_in += call.bytes_in
+        self.bytes_out += call.bytes_out
+
+
+class ApiMetrics:
+    """Aggregates the calls of every endpoint and forwards them to callbacks
+
+    Callbacks get every `ApiCall` as it is recorded, in the thread or the
+    coroutine that made it, so they must be quick and must not raise.
+
+    Args:
+        buckets (Sequence[float]): the upper bounds of the latency buckets
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self._callbacks: List[Callable[[ApiCall], None]] = []
+        self._lock = threading.Lock()
+
+    def record(self, call: ApiCall) -> None:
+        """Aggregate a call and pass it to the callbacks
+
+        Args:
+            call (ApiCall): the call that returned
+        """
+        with self._lock:
+            stats = self.endpoints.get(call.endpoint)
+            if stats is None:
+                stats = self.endpoints[call.endpoint] = EndpointStats(self.buckets)
+            stats.add(call)
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(call)
+
+    def add_callback(self, callback: Callable[[ApiCall], None]) -> None:
+        """Call `callback` with every call recorded from now on"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[ApiCall], None]) -> None:
+        """Stop passing the calls to `callback`"""
+        with self._lock:
+            self._callbacks.remove(callback)
+
+    def reset(self) -> None:
+        """Forget the aggregated calls, keeping the callbacks"""
+        with self._lock:
+            self.endpoints = {}
+
+    def summary(self) -> Dict[str, dict]:
+        """Return the number of calls, latencies, retries and bytes per endpoint
+
+        Returns:
+            Dict[str, dict]: the `calls`, `mean`, `p50` and `p99` latencies,
+                `retries`, `status_codes`, `bytes_in` and `bytes_out` of every
+                endpoint
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": stats.latency.count,
+                    "mean": stats.latency.sum / stats.latency.count,
+                    "p50": stats.latency.quantile(0.5),
+                    "p99": stats.latency.quantile(0.99),
+                    "retries": stats.retries,
+                    "status_codes": dict(stats.status_codes),
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                }
+                for endpoint, stats in sorted(self.endpoints.items())
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        prefix = "prefect_ovh_api"
+        lines = [
+            f"# HELP {prefix}_call_duration_seconds Latency of the API calls.",
+            f"# TYPE {prefix}_call_duration_seconds histogram",
+        ]
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            for endpoint, stats in endpoints:
+                bounds = [str(bound) for bound in stats.latency.buckets] + ["+Inf"]
+                for bound, total in zip(bounds, stats.latency.cumulative()):
+                    lines.append(
+                        f"{prefix}_call_duration_seconds_bucket"
+                        f'{{endpoint="{endpoint}",le="{bound}"}} {total}'
+                    )
+                labels = f'{{endpoint="{endpoint}"}}'
+                lines.append(
+                    f"{prefix}_call_duration_seconds_sum{labels} {stats.latency.sum}"
+                )
+                lines.append(
+                    f"{prefix}_call_duration_seconds_count{labels} "
+                    f"{stats.latency.count}"
+                )
+            for name, description, value in (
+                ("responses_total", "Calls per final status.", None),
+                ("retries_total", "Throttled requests retried.", "retries"),
+                ("received_bytes_total", "Bytes of the responses.", "bytes_in"),
+                ("sent_bytes_total", "Bytes of the requests.", "bytes_out"),
+            ):
+                lines.append(f"# HELP {prefix}_{name} {description}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for endpoint, stats in endpoints:
+                    if value is not None:
+                        lines.append(
+                            f'{prefix}_{name}{{endpoint="{endpoint}"}} '
+                            f"{getattr(stats, value)}"
+                        )
+                        continue
+                    for status_code, count in sorted(stats.status_codes.items()):
+                        lines.append(
+                            f'{prefix}_{name}{{endpoint="{endpoint}",'
+                            f'status_code="{status_code}"}} {count}'
+                        )
+        return "\n".join(lines) + "\n"
+
+    def to_markdown(self) -> str:
+        """Render the summary of the endpoints as a markdown table"""
+        lines = [
+            "| Endpoint | Calls | Mean (s) | p50 (s) | p99 (s) | Retries "
+            "| Status codes | Bytes in | Bytes out |",
+            "|---|---|---|---|---|---|---|---|---|",
+        ]
+        for endpoint, stats in self.summary().items():
+            status_codes = ", ".join(
+                f"{code}: {count}"
+                for code, count in sorted(stats["status_codes"].items())
+            )
+            lines.append(
+                f"| {endpoint} | {stats['calls']} | {stats['mean']:.3f} "
+                f"| {_bound(stats['p50'])} | {_bound(stats['p99'])} "
+                f"| {stats['retries']} | {status_codes} "
+                f"| {stats['bytes_in']} | {stats['bytes_out']} |"
+            )
+        return "\n".join(lines)
+
+    def create_artifact(self, key: Optional[str] = None) -> None:
+        """Publish the summary as a markdown artifact of the current run
+
+        Artifacts need Prefect 2.7 or later.
+
+        Args:
+            key (str): the key of the artifact, to track it across runs
+        """
+        from prefect.artifacts import create_markdown_artifact
+
+        create_markdown_artifact(
+            markdown=self.to_markdown(),
+            key=key,
+            description="Calls to the OVHcloud AI Training API",
+        )
+
+    def serve_prometheus(self, port: int, addr: str = "") -> ThreadingHTTPServer:
+        """Serve `to_prometheus` over HTTP from a daemon thread
+
+        Args:
+            port (int): the port to listen on, 0 for a free one
+            addr (str): the address to listen on, every one by default
+
+        Returns:
+            ThreadingHTTPServer: the server, to `shutdown` once done
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Serves the metrics on every path"""
+
+            def do_GET(self):
+                """Answer with the metrics in the Prometheus text format"""
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                """Keep the scrapes out of stderr"""
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_api_metrics = ApiMetrics()
+
+
+def get_api_metrics() -> ApiMetrics:
+    """Return the metrics recorded by every API call of the process"""
+    return _api_metrics
+
+
+def _bound(value: Optional[float]) -> str:
+    """Format the upper bound of a quantile"""
+    return f"<= {value}" if value is not None else "over the last bucket"
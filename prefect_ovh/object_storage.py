@@ -0,0 +1,561 @@
+"""OVHcloud Object Storage, through its S3 compatible API"""
+import fnmatch
+import hashlib
+import io
+import json
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from prefect import task
+from prefect.filesystems import WritableFileSystem
+from prefect.utilities.asyncutils import run_sync_in_worker_thread, sync_compatible
+from pydantic import Field, SecretStr
+
+from prefect_ovh.client import call_api, resolve_client
+
+MiB = 1024 * 1024
+# Name of the manifests listing the sha256 of the files of a synced directory
+MANIFEST_NAME = ".prefect-ovh-manifest.json"
+# Part sizes of the usual S3 clients, tried to verify multipart ETags
+COMMON_PART_SIZES = (5 * MiB, 8 * MiB, 16 * MiB, 64 * MiB, 100 * MiB)
+
+_s3_clients: Dict[Tuple, object] = {}
+_s3_clients_lock = threading.Lock()
+
+
+class OvhcloudObjectStorage(WritableFileSystem):
+    """
+    Stores files in a container of OVHcloud Object Storage.
+
+    Files larger than `part_size` are uploaded in parts and downloaded with
+    ranged requests, `max_concurrency` of them at a time, so big results and
+    datasets move at the full bandwidth of the link.
+
+    Attributes:
+        bucket (str): The name of the container.
+        region (str): The region of the container, e.g. `gra`.
+        access_key_id (str): The S3 access key of your OVHcloud user.
+        secret_access_key (SecretStr): The S3 secret key of your OVHcloud user.
+        endpoint_url (str): The S3 endpoint, defaults to the one of `region`.
+        basepath (str): The prefix of the objects read and written.
+        part_size (int): The size in bytes of the parts of a transfer.
+        max_concurrency (int): The number of parts transferred at a time.
+
+    Example:
+        Write and read back a result:
+        ```python
+        from prefect_ovh import OvhcloudObjectStorage
+        storage = OvhcloudObjectStorage.load("BLOCK_NAME")
+        storage.write_path("results/metrics.json", b"{}")
+        ```
+    """
+
+    _block_type_name = "OVHcloud Object Storage"
+    _logo_url = "https://images.ctfassets.net/gm98wzqotmnx/08yCE6xpJMX9Kjl5VArDS/c2ede674c20f90b9b6edeab71feffac9/prefect-200x200.png?h=250"  # noqa
+    _documentation_url = "https://Victor2103.github.io/prefect-OVHcloud/object_storage/#prefect_ovh.object_storage.OvhcloudObjectStorage"  # noqa
+
+    bucket: str = Field(default=..., description="The name of the container.")
+    region: str = Field(
+        default="gra", description="The region of the container, e.g. `gra`."
+    )
+    access_key_id: str = Field(
+        default=..., description="The S3 access key of your OVHcloud user."
+    )
+    secret_access_key: SecretStr = Field(
+        default=..., description="The S3 secret key of your OVHcloud user."
+    )
+    endpoint_url: Optional[str] = Field(
+        default=None,
+        description="The S3 endpoint, defaults to the one of the region.",
+    )
+    basepath: str = Field(
+        default="", description="The prefix of the objects read and written."
+    )
+    part_size: int = Field(
+        default=64 * MiB,
+        description="The size in bytes of the parts of a transfer, at least 5 MiB.",
+    )
+    max_concurrency: int = Field(
+        default=10, description="The number of parts transferred at a time."
+    )
+
+    @sync_compatible
+    async def read_path(self, path: str) -> bytes:
+        """Read the content of an object
+
+        Args:
+            path (str): the path of the object, relative to `basepath`
+
+        Returns:
+            bytes: the content of the object
+        """
+        return await run_sync_in_worker_thread(self._read, path)
+
+    @sync_compatible
+    async def write_path(self, path: str, content: bytes) -> str:
+        """Write the content of an object
+
+        Args:
+            path (str): the path of the object, relative to `basepath`
+            content (bytes): the content to write
+
+        Returns:
+            str: the key of the object
+        """
+        return await run_sync_in_worker_thread(self._write, path, content)
+
+    def upload_file(self, local_path: str, path: str) -> str:
+        """Upload a local file, in parallel parts if it is large
+
+        Args:
+            local_path (str): the path of the file to upload
+            path (str): the path of the object, relative to `basepath`
+
+        Returns:
+            str: the key of the object
+        """
+        key = self._resolve_path(path)
+        self._get_s3_client().upload_file(
+            str(local_path), self.bucket, key, Config=self._transfer_config()
+        )
+        return key
+
+    def download_file(self, path: str, local_path: str) -> Path:
+        """Download an object to a local file with parallel ranged requests
+
+        Args:
+            path (str): the path of the object, relative to `basepath`
+            local_path (str): the path of the file to write
+
+        Returns:
+            Path: the path of the file
+        """
+        local_path = Path(local_path)
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        self._get_s3_client().download_file(
+            self.bucket,
+            self._resolve_path(path),
+            str(local_path),
+            Config=self._transfer_config(),
+        )
+        return local_path
+
+    def list_objects(self, prefix: str = "") -> Iterator[dict]:
+        """Yield the objects under a prefix, one listing page at a time
+
+        Args:
+            prefix (str): the prefix of the objects, relative to `basepath`
+
+        Yields:
+            dict: the `Key`, `Size` and `ETag` of every object
+        """
+        paginator = self._get_s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(
+            Bucket=self.bucket, Prefix=self._resolve_path(prefix)
+        ):
+            yield from page.get("Contents", [])
+
+    def sync_directory(
+        self,
+        local_dir: str,
+        prefix: str = "",
+        max_workers: int = 8,
+        delete: bool = False,
+    ) -> dict:
+        """Upload the files of a directory that changed since the last sync
+
+        The sha256 of every file is kept in a manifest stored with the files,
+        under `prefix`, and in a local cache under the Prefect home, where it
+        saves hashing files whose size and modification time did not change.
+        Only the files whose hash differs from the remote manifest, or which
+        are missing from the container, are uploaded, `max_workers` at a time.
+
+        Args:
+            local_dir (str): the directory to upload
+            prefix (str): the prefix of the objects, relative to `basepath`
+            max_workers (int): the number of files uploaded at a time
+            delete (bool): whether to delete the objects of files removed locally
+
+        Returns:
+            dict: the `uploaded`, `skipped` and `deleted` file counts and the
+                `bytes_sent` and `bytes_skipped`
+        """
+        local_dir = Path(local_dir)
+        prefix = prefix.strip("/")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            local = _hash_directory(local_dir, executor)
+            remote = self._read_manifest(prefix)
+            start = len(self._resolve_path(_join(prefix, "")))
+            sizes = {
+                obj["Key"][start:]: obj["Size"]
+                for obj in self.list_objects(_join(prefix, ""))
+            }
+            changed = [
+                path
+                for path, entry in local.items()
+                if remote.get(path, {}).get("sha256") != entry["sha256"]
+                or sizes.get(path) != entry["size"]
+            ]
+            list(
+                executor.map(
+                    lambda path: self.upload_file(
+                        local_dir / path, _join(prefix, path)
+                    ),
+                    changed,
+                )
+            )
+        removed = [
+            path for path in sizes if path not in local and path != MANIFEST_NAME
+        ]
+        if delete:
+            self._delete([_join(prefix, path) for path in removed])
+        self._write(
+            _join(prefix, MANIFEST_NAME),
+            json.dumps(
+                {
+                    path: {"sha256": entry["sha256"], "size": entry["size"]}
+                    for path, entry in local.items()
+                }
+            ).encode(),
+        )
+        bytes_sent = sum(local[path]["size"] for path in changed)
+        return {
+            "uploaded": len(changed),
+            "skipped": len(local) - len(changed),
+            "deleted": len(removed) if delete else 0,
+            "bytes_sent": bytes_sent,
+            "bytes_skipped": sum(entry["size"] for entry in local.values())
+            - bytes_sent,
+        }
+
+    def _read(self, path: str) -> bytes:
+        """Download an object in memory"""
+        buffer = io.BytesIO()
+        self._get_s3_client().download_fileobj(
+            self.bucket,
+            self._resolve_path(path),
+            buffer,
+            Config=self._transfer_config(),
+        )
+        return buffer.getvalue()
+
+    def _write(self, path: str, content: bytes) -> str:
+        """Upload an object from memory"""
+        key = self._resolve_path(path)
+        self._get_s3_client().upload_fileobj(
+            io.BytesIO(content), self.bucket, key, Config=self._transfer_config()
+        )
+        return key
+
+    def _read_manifest(self, prefix: str) -> Dict[str, dict]:
+        """Return the manifest of a synced prefix, empty if there is none"""
+        from botocore.exceptions import ClientError
+
+        try:
+            return json.loads(self._read(_join(prefix, MANIFEST_NAME)))
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return {}
+            raise
+
+    def _delete(self, paths: list) -> None:
+        """Delete objects, a thousand at a time as allowed by the S3 API"""
+        for start in range(0, len(paths), 1000):
+            self._get_s3_client().delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [
+                        {"Key": self._resolve_path(path)}
+                        for path in paths[start : start + 1000]
+                    ]
+                },
+            )
+
+    def _resolve_path(self, path: str) -> str:
+        """Prefix a path with `basepath`"""
+        if not self.basepath:
+            return path
+        return f"{self.basepath.rstrip('/')}/{path.lstrip('/')}"
+
+    def _transfer_config(self):
+        """Split the transfers in `part_size` parts sent concurrently"""
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=self.part_size,
+            multipart_chunksize=self.part_size,
+            max_concurrency=self.max_concurrency,
+        )
+
+    def _get_s3_client(self):
+        """Return the S3 client of the block, shared with identical blocks"""
+        # boto3 is only imported by the processes using the block
+        import boto3
+        from botocore.config import Config
+
+        endpoint_url = self.endpoint_url or f"https://s3.{self.region}.io.cloud.ovh.net"
+        secret = self.secret_access_key.get_secret_value()
+        key = (endpoint_url, self.access_key_id, secret, self.max_concurrency)
+        with _s3_clients_lock:
+            client = _s3_clients.get(key)
+            if client is None:
+                client = _s3_clients[key] = boto3.client(
+                    "s3",
+                    endpoint_url=endpoint_url,
+                    region_name=self.region,
+                    aws_access_key_id=self.access_key_id,
+                    aws_secret_access_key=secret,
+                    # one connection per part in flight
+                    config=Config(max_pool_connections=max(10, self.max_concurrency)),
+                )
+        return client
+
+
+@task
+def sync_dataset(
+    storage: OvhcloudObjectStorage,
+    local_dir: str,
+    prefix: str = "",
+    max_workers: int = 8,
+    delete: bool = False,
+) -> dict:
+    """Upload the files of a dataset that changed since its last upload
+
+    Run it before submitting a job mounting the container as a volume, so the
+    job sees the local dataset while only the changes are transferred.
+
+    Args:
+        storage (OvhcloudObjectStorage): the container of the dataset
+        local_dir (str): the directory of the dataset
+        prefix (str): the prefix of the objects, relative to `basepath`
+        max_workers (int): the number of files uploaded at a time
+        delete (bool): whether to delete the objects of files removed locally
+
+    Returns:
+        dict: the file counts and the bytes sent and skipped
+    """
+    return storage.sync_directory(local_dir, prefix, max_workers, delete)
+
+
+@task
+def collect_job_outputs(
+    job_id: str,
+    pattern: str,
+    dest: str,
+    client=None,
+    *,
+    storage: OvhcloudObjectStorage,
+    mount_path: Optional[str] = None,
+    max_workers: int = 8,
+) -> List[Path]:
+    """Download the outputs of a job and verify their checksums
+
+    The objects are read from the container of the job volume mounted at
+    `mount_path`, or of its first writable volume, using the credentials of
+    `storage`. Each matching object is streamed to `dest` with parallel
+    ranged requests, `max_workers` objects at a time, then checked against
+    its ETag.
+
+    Args:
+        job_id (str): the id of the job
+        pattern (str): a glob matched against the paths of the objects
+            relative to the volume, e.g. `checkpoints/*.pt`
+        dest (str): the local directory of the outputs
+        client: an authenticated client or a `ClientHandle`, the client of
+            `use_client` if not set
+        storage (OvhcloudObjectStorage): a block holding the S3 credentials,
+            keyword-only
+        mount_path (str): the mount path of the output volume in the job
+        max_workers (int): the number of objects downloaded at a time
+
+    Raises:
+        ValueError: if the job has no matching volume, an object would be
+            written out of `dest` or a download is corrupt
+
+    Returns:
+        List[Path]: the paths of the downloaded files
+    """
+    from ov_hcloud_ai_solution_client.api.job import job_get
+
+    response = call_api(job_get, resolve_client(client), id=job_id)
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"Failed to get the infos of job {job_id!r}: {response.content.decode()}"
+        )
+    volume = _output_volume(json.loads(response.content), mount_path)
+    outputs = storage.copy(update=volume)
+    dest = Path(dest)
+    start = len(outputs._resolve_path(""))
+    # every target is checked before the first download starts
+    targets = [
+        (obj, _local_path(dest, obj["Key"][start:]))
+        for obj in outputs.list_objects()
+        if fnmatch.fnmatch(obj["Key"][start:], pattern)
+    ]
+
+    def download(target: Tuple[dict, Path]) -> Path:
+        """Download an object to its local path and check it against its ETag"""
+        obj, local_path = target
+        outputs.download_file(obj["Key"][start:], local_path)
+        if not _etag_matches(local_path, obj["ETag"], outputs.part_size):
+            local_path.unlink()
+            raise ValueError(f"The checksum of {obj['Key']!r} does not match")
+        return local_path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(download, targets))
+
+
+def _output_volume(job: Dict[str, Any], mount_path: Optional[str]) -> dict:
+    """Return the container, region and prefix of the output volume of a job"""
+    for volume in job["spec"].get("volumes", []):
+        # volumes are either flat or describe their container in `dataStore`
+        store = {**volume, **volume.get("dataStore", {})}
+        if "container" not in store:
+            continue
+        if mount_path is None and volume.get("permission", "RO") == "RO":
+            continue
+        if mount_path is not None and volume.get("mountPath") != mount_path:
+            continue
+        update = {"bucket": store["container"], "basepath": store.get("prefix", "")}
+        region = store.get("alias") or store.get("region")
+        if region:
+            update["region"] = region.lower()
+        return update
+    raise ValueError(
+        f"Job {job['id']!r} has no "
+        + (f"volume mounted at {mount_path!r}" if mount_path else "writable volume")
+    )
+
+
+def _local_path(dest: Path, path: str) -> Path:
+    """Return the local path of an object, refusing the keys escaping `dest`
+
+    Object keys are chosen by the job, so a key such as `../../.bashrc` or an
+    absolute one must not be written out of the directory of the outputs.
+    """
+    local_path = dest / path
+    if dest.resolve() not in local_path.resolve().parents:
+        raise ValueError(f"The object {path!r} would be written out of {str(dest)!r}")
+    return local_path
+
+
+def _join(prefix: str, path: str) -> str:
+    """Join a prefix and a relative path with a slash"""
+    return f"{prefix}/{path}" if prefix else path
+
+
+def _hash_directory(local_dir: Path, executor: ThreadPoolExecutor) -> Dict[str, dict]:
+    """Return the sha256, size and mtime of every file of a directory
+
+    Hashes are reused from the local cache of the directory when the size and
+    the modification time of a file did not change, and the cache is updated.
+    """
+    cache_path = _hash_cache_path(local_dir)
+    try:
+        cached = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        cached = {}
+    files = {}
+    for path in sorted(local_dir.rglob("*")):
+        # skip the manifests left in the directory by the previous versions
+        if path.is_file() and path != local_dir / MANIFEST_NAME:
+            stat = path.stat()
+            files[path.relative_to(local_dir).as_posix()] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+
+    def entry(item):
+        """Return the stat of a file with its hash, reused when unchanged"""
+        relative, stat = item
+        previous = cached.get(relative, {})
+        if (previous.get("size"), previous.get("mtime_ns")) == (
+            stat["size"],
+            stat["mtime_ns"],
+        ):
+            return relative, {**stat, "sha256": previous["sha256"]}
+        return relative, {**stat, "sha256": _sha256(local_dir / relative)}
+
+    hashed = dict(executor.map(entry, files.items()))
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(hashed))
+    except OSError:
+        # the cache only saves hashing again, the sync does not need it
+        pass
+    return hashed
+
+
+def _hash_cache_path(local_dir: Path) -> Path:
+    """Return the path of the local hash cache of a directory
+
+    The cache is kept under the Prefect home rather than in the directory, so
+    that syncing a dataset never writes into it.
+    """
+    from prefect.settings import PREFECT_HOME
+
+    key = hashlib.sha256(str(local_dir.resolve()).encode()).hexdigest()
+    return Path(PREFECT_HOME.value()) / "prefect-ovh" / "hashes" / f"{key}.json"
+
+
+def _sha256(path: Path) -> str:
+    """Hash a file by chunks, without loading it in memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(MiB), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _etag_matches(path: Path, etag: str, part_size: int) -> bool:
+    """Check a file against the ETag of its object
+
+    The ETag of an object uploaded at once is the md5 of its content; the one
+    of a multipart upload is the md5 of the md5s of its parts, followed by the
+    number of parts. The part size is not stored, so the one of this block,
+    the usual ones and the smallest number of MiB giving that many parts are
+    tried.
+    """
+    etag = etag.strip('"')
+    if "-" not in etag:
+        return _md5_of_parts(path, None) == etag
+    digest, count = etag.split("-")
+    size = path.stat().st_size
+    candidates = {
+        part_size,
+        *COMMON_PART_SIZES,
+        math.ceil(size / int(count) / MiB) * MiB,
+    }
+    return any(
+        _md5_of_parts(path, candidate) == digest
+        for candidate in candidates
+        if candidate and math.ceil(size / candidate) == int(count)
+    )
+
+
+def _md5_of_parts(path: Path, part_size: Optional[int]) -> str:
+    """Hash a file by chunks, as a whole or as the md5 of the md5s of its parts"""
+    if part_size is None:
+        digest = hashlib.md5()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(MiB), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    parts = []
+    with open(path, "rb") as file:
+        while True:
+            part, remaining = hashlib.md5(), part_size
+            while remaining:
+                chunk = file.read(min(MiB, remaining))
+                if not chunk:
+                    break
+                part.update(chunk)
+                remaining -= len(chunk)
+            if remaining == part_size:
+                break
+            parts.append(part.digest())
+    return hashlib.md5(b"".join(parts)).hexdigest()
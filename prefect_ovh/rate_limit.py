@@ -0,0 +1,155 @@
+"""Client-side rate limiting of the OVHcloud AI Training API"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_RATE = 25.0
+DEFAULT_CAPACITY = 50.0
+
+_limiters: Dict[Tuple[str, str], "TokenBucket"] = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """A token bucket that slows down when the API throttles its callers
+
+    Every request takes a token; tokens come back at `rate` per second up to
+    `capacity`. A throttled response halves the rate, down to `min_rate`, and
+    blocks the bucket for the duration asked by the API. Each successful
+    response then gives back a twentieth of the configured rate, so the bucket
+    settles just under the quota of the API.
+
+    Args:
+        rate (float): the number of requests per second
+        capacity (float): the number of requests that can be sent in a burst
+        min_rate (float): the lowest rate the bucket slows down to, defaults
+            to a sixteenth of `rate`
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self) -> None:
+        """Block until a request can be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait until a request can be sent without blocking the event loop"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """Speed up again after a request that was not throttled"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        """Slow down after a throttled request
+
+        Args:
+            retry_after (float): the seconds asked by the API before retrying,
+                one token interval when the API does not say
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            delay = retry_after if retry_after is not None else 1 / self.rate
+            self._blocked_until = max(self._blocked_until, now + delay)
+
+
+def get_rate_limiter(token: str, base_url: str) -> TokenBucket:
+    """Return the rate limiter shared by the requests of a token in a region
+
+    Args:
+        token (str): the OVHcloud AI token
+        base_url (str): the url of the AI Training API of the region
+
+    Returns:
+        TokenBucket: the limiter, created with the default rate on first use
+    """
+    key = (token, _region(base_url))
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = TokenBucket(DEFAULT_RATE, DEFAULT_CAPACITY)
+    return limiter
+
+
+def configure_rate_limiter(
+    token: str,
+    base_url: str,
+    rate: float = DEFAULT_RATE,
+    capacity: float = DEFAULT_CAPACITY,
+    min_rate: Optional[float] = None,
+) -> TokenBucket:
+    """Set the rate limit of a token in a region
+
+    Args:
+        token (str): the OVHcloud AI token
+        base_url (str): the url of the AI Training API of the region
+        rate (float): the number of requests per second
+        capacity (float): the number of requests that can be sent in a burst
+        min_rate (float): the lowest rate the limiter slows down to
+
+    Returns:
+        TokenBucket: the new limiter, used by every following request
+    """
+    limiter = TokenBucket(rate, capacity, min_rate)
+    with _limiters_lock:
+        _limiters[(token, _region(base_url))] = limiter
+    return limiter
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Read the seconds to wait from the `Retry-After` header of a response
+
+    Args:
+        headers (Mapping[str, str]): the headers of the response
+
+    Returns:
+        Optional[float]: the seconds to wait, None if the header is missing
+            or invalid
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _region(base_url: str) -> str:
+    """Return the region of an API url, e.g. `gra` for the default one"""
+    host = urlparse(base_url).hostname or base_url
+    return host.split(".")[0]
@@ -0,0 +1,120 @@
+"""Coalescing of concurrent identical calls"""
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs a single call at a time per key, sharing its outcome with waiters
+
+    A thread calling `do` while another one is running the same key waits for
+    it and gets its result, or its exception, instead of running the call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "_Call"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run `fn`, or wait for the call of the same key already running
+
+        Args:
+            key (Hashable): the key identifying identical calls
+            fn (Callable): the call to run
+
+        Returns:
+            Any: the result of the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __len__(self) -> int:
+        """Return the number of calls in flight"""
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Async version of `SingleFlight`, for the coroutines of one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `fn()`, or the call of the same key already in flight
+
+        Args:
+            key (Hashable): the key identifying identical calls
+            fn (Callable): returns the awaitable to run
+
+        Returns:
+            Any: the result of the call
+        """
+        while key in self._calls:
+            future = self._calls[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the coroutine running the call was cancelled, not this one
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # mark the exception as retrieved when nobody was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        """Return the number of calls in flight"""
+        return len(self._calls)
+
+
+_async_flights: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_async_single_flight() -> AsyncSingleFlight:
+    """Return the `AsyncSingleFlight` of the running event loop"""
+    loop = asyncio.get_running_loop()
+    flight = _async_flights.get(loop)
+    if flight is None:
+        flight = _async_flights[loop] = AsyncSingleFlight()
+    return flight
+
+
+class _Call:
+    """A call of `SingleFlight` and its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
@@ -1,51 +1,73 @@
 """This is an example tasks module"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
 from ov_hcloud_ai_solution_client import AuthenticatedClient
-from ov_hcloud_ai_solution_client.api.job import (
-    job_get,
-    job_kill,
-    job_log,
-    job_new,
-    job_start,
-)
-from ov_hcloud_ai_solution_client.api.me import me
 from ov_hcloud_ai_solution_client.models import Job, JobSpec, Me
-from ov_hcloud_ai_solution_client.types import Response
-from prefect import task
+from prefect import get_run_logger, task
+
+from prefect_ovh.api import OvhAIClient
+from prefect_ovh.client import (
+    DEFAULT_BASE_URL,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    get_pooled_client,
+)
+from prefect_ovh.jobs import DEFAULT_PAGE_SIZE, JOB_TERMINAL_STATES
 
 
 @task
-def create_client(token: str) -> str:
+def create_client(
+    token: str,
+    base_url: str = DEFAULT_BASE_URL,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+) -> AuthenticatedClient:
     """
     Sample task to create an OVHcloud Client
 
+    The client is shared by every task of the process using the same token
+    and base url and keeps its connections open between calls.
+    With distributed task runners such as Dask, pass a picklable
+    `prefect_ovh.client.ClientHandle` to the tasks instead.
+    The tasks called without a client use the one set by
+    `prefect_ovh.client.use_client`, e.g. around the body of a flow.
+
     Returns:
         A client object from SDK
     """
-    client = AuthenticatedClient(
-        base_url="https://gra.training.ai.cloud.ovh.net", token=token
+    return get_pooled_client(
+        token=token,
+        base_url=base_url,
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
     )
-    return client
 
 
 @task
-def hello_prefect_ovh(client) -> str:
+def hello_prefect_ovh(client=None, as_model: bool = False) -> Union[str, Me]:
     """
     Sample task that test your credentials
 
+    Args:
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        as_model (bool): return the `Me` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
+
     Returns:
         You credentials in json
         or wrong identification
     """
-    with client as client:
-        # or if you need more info (e.g. status_code)
-        response: Response[Me] = me.sync_detailed(client=client)
-    return response.content.decode()
+    return OvhAIClient(client).me(as_model)
 
 
 @task
 def create_a_job(
-    client,
-    image,
+    client=None,
+    image=None,
     http_port=8080,
     command=[],
     listEnvVars=[],
@@ -55,54 +77,56 @@ def create_a_job(
     gpu=1,
     sshPublicKeys=[],
     volumes=[],
-) -> str:
+    as_model: bool = False,
+) -> Union[str, Job]:
     """
     Sample task that create an AI Training Job
 
+    Set `as_model` to get the `Job` model parsed by the SDK instead of json.
+
     Returns:
         The json response when creating a job
     """
-    # First of all we create the request
-    request = {
-        "command": command,
-        "defaultHttpPort": http_port,
-        "deletionRequested": False,
-        "envVars": listEnvVars,
-        "labels": dicLabels,
-        "image": image,
-        "name": name,
-        "resources": {"cpu": cpu, "gpu": gpu},
-        "sshPublicKeys": sshPublicKeys,
-        "volumes": volumes,
-    }
-    if name is None:
-        name = request.pop("name")
-    if cpu != 0:
-        request.update({"resources": {"cpu": cpu, "gpu": 0}})
-
-    with client as client:
-        response: Response[Job] = job_new.sync_detailed(
-            client=client, json_body=JobSpec.from_dict(request)
-        )
-    return response.content.decode()
+    request = _job_spec(
+        image,
+        http_port,
+        command,
+        listEnvVars,
+        dicLabels,
+        name,
+        cpu,
+        gpu,
+        sshPublicKeys,
+        volumes,
+    )
+    return OvhAIClient(client).create_job(request, as_model)
 
 
 @task
-def get_infos_of_job(id_job: str, client) -> str:
+def get_infos_of_job(
+    id_job: str, client=None, as_model: bool = False, use_cache: bool = True
+) -> Union[str, Job]:
     """
     Sample task that Send the infos of a job
 
+    The infos are served from the job cache of the process when they were
+    fetched less than its time to live ago, see `prefect_ovh.cache`.
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        as_model (bool): return the `Job` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
+        use_cache (bool): whether a cached response can be returned
+
     Returns:
         The json response asking infos of a job
     """
-    with client as client:
-        response: Response[Job] = job_get.sync_detailed(id=id_job, client=client)
-
-    return response.content.decode()
+    return OvhAIClient(client).get_job(id_job, as_model, use_cache)
 
 
 @task
-def get_logs_of_job(id_job: str, client) -> str:
+def get_logs_of_job(id_job: str, client=None) -> str:
     """Sample task that returns the logs of a given job
 
     Args:
@@ -112,38 +136,458 @@ def get_logs_of_job(id_job: str, client) -> str:
     Returns:
         str: the logs of the jobs in a string
     """
-    with client as client:
-        response: Response[Job] = job_log.sync_detailed(id=id_job, client=client)
-    return response.content.decode()
+    return OvhAIClient(client).get_logs(id_job)
 
 
 @task
-def start_an_existing_job(id_job: str, client) -> str:
+def start_an_existing_job(
+    id_job: str, client=None, as_model: bool = False
+) -> Union[str, Job]:
     """Start a job in interrupted or done state
 
     Args:
         id_job (str): the id of the job
         client (AuthenticatedClient): the authenticated Client
+        as_model (bool): return the `Job` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
 
     Returns:
         str: The infos of the job running
     """
-    with client as client:
-        response: Response[Job] = job_start.sync_detailed(id=id_job, client=client)
-    return response.content.decode()
+    return OvhAIClient(client).start_job(id_job, as_model)
 
 
 @task
-def stop_an_existing_job(id_job: str, client) -> str:
+def stop_an_existing_job(
+    id_job: str, client=None, as_model: bool = False
+) -> Union[str, Job]:
     """Stop an existing job
 
     Args:
         id_job (str): the id of the ovhai training job
         client (_type_): an authenticated client
+        as_model (bool): return the `Job` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
+
+    Returns:
+        str: the infos of the job
+    """
+    return OvhAIClient(client).kill_job(id_job, as_model)
+
+
+@task
+def get_new_logs_of_job(id_job: str, client=None) -> str:
+    """Return the lines of the logs of a job added since the previous call
+
+    The offset of the logs already read is remembered per job by the process,
+    so polling a long running job only decodes what it printed in between.
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+
+    Returns:
+        str: the new complete lines of the logs
+    """
+    return OvhAIClient(client).get_new_logs(id_job)
+
+
+@task
+def mirror_logs_of_job(
+    id_job: str,
+    client=None,
+    poll_interval: float = 5,
+    timeout: Optional[float] = None,
+) -> int:
+    """Copy the logs of a job into the Prefect logger until the job is over
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        poll_interval (float): the seconds between two polls of the logs
+        timeout (float): the maximum seconds to follow the job, forever if not
+            set
+
+    Raises:
+        UnexpectedStatus: if the job or its logs cannot be read
+        TimeoutError: if the job is not over after `timeout`
+
+    Returns:
+        int: the number of lines mirrored
+    """
+    logger = get_run_logger()
+    count = 0
+    lines = OvhAIClient(client).tail_logs(
+        id_job, poll_interval=poll_interval, timeout=timeout
+    )
+    for line in lines:
+        logger.info(line)
+        count += 1
+    return count
+
+
+@task
+def list_jobs(
+    client=None,
+    labels: Optional[Dict[str, str]] = None,
+    state: Optional[str] = None,
+    updated_after: Optional[datetime] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    limit: Optional[int] = None,
+    as_model: bool = False,
+) -> List[Union[dict, Job]]:
+    """List the jobs of the project matching some filters
+
+    Use `prefect_ovh.jobs.iter_jobs` to go through many jobs without keeping
+    them all in memory.
+
+    Args:
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        labels (Dict[str, str]): only the jobs having all these labels
+        state (str): only the jobs in this state, e.g. `RUNNING`
+        updated_after (datetime): only the jobs updated after this date
+        page_size (int): the number of jobs fetched per request
+        limit (int): the maximum number of jobs returned
+        as_model (bool): return the `Job` models instead of dicts
+
+    Returns:
+        List[Union[dict, Job]]: the jobs
+    """
+    return OvhAIClient(client).list_jobs(
+        labels, state, updated_after, page_size, limit, as_model
+    )
+
+
+@task
+def wait_for_job_state(
+    id_job: str,
+    client=None,
+    target_states: Iterable[str] = JOB_TERMINAL_STATES,
+    timeout: float = 600,
+    poll_interval: float = 1,
+    max_poll_interval: float = 30,
+) -> dict:
+    """Wait until a job reaches one of the given states
+
+    The job is polled with an exponential backoff plus jitter, starting at
+    `poll_interval` seconds and doubling up to `max_poll_interval`, so short
+    transitions are seen quickly without hammering the API on long ones.
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        target_states (Iterable[str]): the states to wait for, e.g. `["RUNNING"]`
+        timeout (float): the maximum number of seconds to wait
+        poll_interval (float): the first delay between two polls in seconds
+        max_poll_interval (float): the maximum delay between two polls
+
+    Raises:
+        TimeoutError: if the job is not in a target state after `timeout`
+        UnexpectedStatus: if the job cannot be read, e.g. it does not exist
+
+    Returns:
+        dict: the reached `state`, the `elapsed` seconds, the `transitions`
+            observed as `(state, seconds since the start)` pairs and the last
+            `job` infos in json
+    """
+    return OvhAIClient(client).wait_for_job_state(
+        id_job, target_states, timeout, poll_interval, max_poll_interval
+    )
+
+
+@task
+def create_jobs_bulk(
+    specs: List[Union[dict, JobSpec]], client=None, max_concurrency: int = 10
+) -> List[dict]:
+    """Submit many jobs at once
+
+    The jobs are submitted by at most `max_concurrency` threads sharing the
+    connection pool of `client`. A failed submission does not stop the others.
+
+    Args:
+        specs (List[Union[dict, JobSpec]]): the JobSpec of each job, as models
+            or as dicts in the API format
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        max_concurrency (int): the maximum number of submissions in flight
+
+    Returns:
+        List[dict]: one result per spec, in the order of `specs`, with the
+            `status_code`, the created `job` in json and the `error` if any
+    """
+    return OvhAIClient(client).create_jobs(specs, max_concurrency)
+
+
+@task
+async def hello_prefect_ovh_async(
+    client=None, as_model: bool = False
+) -> Union[str, Me]:
+    """Async version of `hello_prefect_ovh`
+
+    Args:
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        as_model (bool): return the `Me` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
+
+    Returns:
+        str: your credentials in json or wrong identification
+    """
+    return await OvhAIClient(client).me_async(as_model)
+
+
+@task
+async def create_a_job_async(
+    client=None,
+    image=None,
+    http_port=8080,
+    command=[],
+    listEnvVars=[],
+    dicLabels={},
+    name=None,
+    cpu=0,
+    gpu=1,
+    sshPublicKeys=[],
+    volumes=[],
+    as_model: bool = False,
+) -> Union[str, Job]:
+    """Async version of `create_a_job`
+
+    Returns:
+        The json response when creating a job
+    """
+    request = _job_spec(
+        image,
+        http_port,
+        command,
+        listEnvVars,
+        dicLabels,
+        name,
+        cpu,
+        gpu,
+        sshPublicKeys,
+        volumes,
+    )
+    return await OvhAIClient(client).create_job_async(request, as_model)
+
+
+@task
+async def get_infos_of_job_async(
+    id_job: str, client=None, as_model: bool = False, use_cache: bool = True
+) -> Union[str, Job]:
+    """Async version of `get_infos_of_job`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        as_model (bool): return the `Job` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
+        use_cache (bool): whether a cached response can be returned
+
+    Returns:
+        str: the json response asking infos of a job
+    """
+    return await OvhAIClient(client).get_job_async(id_job, as_model, use_cache)
+
+
+@task
+async def get_logs_of_job_async(id_job: str, client=None) -> str:
+    """Async version of `get_logs_of_job`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+
+    Returns:
+        str: the logs of the jobs in a string
+    """
+    return await OvhAIClient(client).get_logs_async(id_job)
+
+
+@task
+async def start_an_existing_job_async(
+    id_job: str, client=None, as_model: bool = False
+) -> Union[str, Job]:
+    """Async version of `start_an_existing_job`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        as_model (bool): return the `Job` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
+
+    Returns:
+        str: The infos of the job running
+    """
+    return await OvhAIClient(client).start_job_async(id_job, as_model)
+
+
+@task
+async def stop_an_existing_job_async(
+    id_job: str, client=None, as_model: bool = False
+) -> Union[str, Job]:
+    """Async version of `stop_an_existing_job`
+
+    Args:
+        id_job (str): the id of the ovhai training job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        as_model (bool): return the `Job` model parsed by the SDK instead of json
+            (an error response then raises `UnexpectedStatus`)
 
     Returns:
         str: the infos of the job
     """
-    with client as client:
-        response: Response[Job] = job_kill.sync_detailed(id=id_job, client=client)
-    return response.content.decode()
+    return await OvhAIClient(client).kill_job_async(id_job, as_model)
+
+
+@task
+async def get_new_logs_of_job_async(id_job: str, client=None) -> str:
+    """Async version of `get_new_logs_of_job`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+
+    Returns:
+        str: the new complete lines of the logs
+    """
+    return await OvhAIClient(client).get_new_logs_async(id_job)
+
+
+@task
+async def mirror_logs_of_job_async(
+    id_job: str,
+    client=None,
+    poll_interval: float = 5,
+    timeout: Optional[float] = None,
+) -> int:
+    """Async version of `mirror_logs_of_job`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        poll_interval (float): the seconds between two polls of the logs
+        timeout (float): the maximum seconds to follow the job, forever if not
+            set
+
+    Returns:
+        int: the number of lines mirrored
+    """
+    logger = get_run_logger()
+    count = 0
+    lines = OvhAIClient(client).tail_logs_async(
+        id_job, poll_interval=poll_interval, timeout=timeout
+    )
+    async for line in lines:
+        logger.info(line)
+        count += 1
+    return count
+
+
+@task
+async def list_jobs_async(
+    client=None,
+    labels: Optional[Dict[str, str]] = None,
+    state: Optional[str] = None,
+    updated_after: Optional[datetime] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    limit: Optional[int] = None,
+    as_model: bool = False,
+) -> List[Union[dict, Job]]:
+    """Async version of `list_jobs`
+
+    Args:
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        labels (Dict[str, str]): only the jobs having all these labels
+        state (str): only the jobs in this state, e.g. `RUNNING`
+        updated_after (datetime): only the jobs updated after this date
+        page_size (int): the number of jobs fetched per request
+        limit (int): the maximum number of jobs returned
+        as_model (bool): return the `Job` models instead of dicts
+
+    Returns:
+        List[Union[dict, Job]]: the jobs
+    """
+    return await OvhAIClient(client).list_jobs_async(
+        labels, state, updated_after, page_size, limit, as_model
+    )
+
+
+@task
+async def wait_for_job_state_async(
+    id_job: str,
+    client=None,
+    target_states: Iterable[str] = JOB_TERMINAL_STATES,
+    timeout: float = 600,
+    poll_interval: float = 1,
+    max_poll_interval: float = 30,
+) -> dict:
+    """Async version of `wait_for_job_state`
+
+    Args:
+        id_job (str): the id of the job
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        target_states (Iterable[str]): the states to wait for, e.g. `["RUNNING"]`
+        timeout (float): the maximum number of seconds to wait
+        poll_interval (float): the first delay between two polls in seconds
+        max_poll_interval (float): the maximum delay between two polls
+
+    Raises:
+        TimeoutError: if the job is not in a target state after `timeout`
+
+    Returns:
+        dict: the reached state, the elapsed time, the transitions and the job
+    """
+    return await OvhAIClient(client).wait_for_job_state_async(
+        id_job, target_states, timeout, poll_interval, max_poll_interval
+    )
+
+
+@task
+async def create_jobs_bulk_async(
+    specs: List[Union[dict, JobSpec]], client=None, max_concurrency: int = 10
+) -> List[dict]:
+    """Async version of `create_jobs_bulk`
+
+    Args:
+        specs (List[Union[dict, JobSpec]]): the JobSpec of each job, as models
+            or as dicts in the API format
+        client (AuthenticatedClient): an authenticated client or a `ClientHandle`
+        max_concurrency (int): the maximum number of submissions in flight
+
+    Returns:
+        List[dict]: one result per spec, in the order of `specs`
+    """
+    return await OvhAIClient(client).create_jobs_async(specs, max_concurrency)
+
+
+def _job_spec(
+    image,
+    http_port,
+    command,
+    listEnvVars,
+    dicLabels,
+    name,
+    cpu,
+    gpu,
+    sshPublicKeys,
+    volumes,
+) -> JobSpec:
+    """Build the JobSpec sent by the job creation tasks"""
+    if image is None:
+        raise ValueError("The `image` of the job is required")
+    request = {
+        "command": command,
+        "defaultHttpPort": http_port,
+        "deletionRequested": False,
+        "envVars": listEnvVars,
+        "labels": dicLabels,
+        "image": image,
+        "name": name,
+        "resources": {"cpu": cpu, "gpu": gpu},
+        "sshPublicKeys": sshPublicKeys,
+        "volumes": volumes,
+    }
+    if name is None:
+        request.pop("name")
+    if cpu != 0:
+        request.update({"resources": {"cpu": cpu, "gpu": 0}})
+    return JobSpec.from_dict(request)
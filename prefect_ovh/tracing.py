@@ -0,0 +1,83 @@
+"""Optional OpenTelemetry spans around the calls to the AI Training API
+
+Spans are only created when `opentelemetry-api` is installed, e.g. with
+`pip install prefect-OVHcloud[tracing]`, and exported by the tracer provider
+the application configures. Otherwise every function here does nothing.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from prefect.context import FlowRunContext, TaskRunContext
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+TRACER_NAME = "prefect_ovh"
+
+
+@contextmanager
+def api_span(endpoint: str, kwargs: Dict[str, Any]) -> Iterator[Optional[Any]]:
+    """Run an API call in a client span, current for the duration of the call
+
+    The span is a child of the current span, e.g. the one of the flow or the
+    task run, and carries the ids of the Prefect runs and of the job. An
+    exception raised by the call is recorded on the span.
+
+    Args:
+        endpoint (str): the name of the endpoint, e.g. `job_get`
+        kwargs (Dict[str, Any]): the arguments of the endpoint
+
+    Yields:
+        Optional[Span]: the span, None when OpenTelemetry is not installed
+    """
+    if trace is None:
+        yield None
+        return
+    tracer = trace.get_tracer(TRACER_NAME)
+    with tracer.start_as_current_span(
+        f"ovhcloud.ai {endpoint}", kind=trace.SpanKind.CLIENT
+    ) as span:
+        # without a configured tracer provider the span is a cheap no-op
+        if span.is_recording():
+            span.set_attribute("ovhcloud.ai.endpoint", endpoint)
+            if "id" in kwargs:
+                span.set_attribute("ovhcloud.ai.job_id", str(kwargs["id"]))
+            for name, value in _run_ids().items():
+                span.set_attribute(name, value)
+        yield span
+
+
+def set_call_result(span: Optional[Any], response: Optional[Any], retries: int) -> None:
+    """Set the status, the retries and the new job id of a call on its span
+
+    Args:
+        span (Optional[Span]): the span of `api_span`, None to do nothing
+        response (Optional[Response]): the last response, None if the call raised
+        retries (int): the number of throttled requests retried
+    """
+    if span is None or not span.is_recording():
+        return
+    span.set_attribute("ovhcloud.ai.retries", retries)
+    if response is None:
+        return
+    status_code = int(response.status_code)
+    span.set_attribute("http.status_code", status_code)
+    job_id = getattr(response.parsed, "id", None)
+    if isinstance(job_id, str):
+        span.set_attribute("ovhcloud.ai.job_id", job_id)
+    if status_code >= 400:
+        span.set_status(trace.Status(trace.StatusCode.ERROR, f"HTTP {status_code}"))
+
+
+def _run_ids() -> Dict[str, str]:
+    """Return the ids of the current Prefect flow run and task run, if any"""
+    ids = {}
+    flow_run_context = FlowRunContext.get()
+    if flow_run_context is not None and flow_run_context.flow_run is not None:
+        ids["prefect.flow_run.id"] = str(flow_run_context.flow_run.id)
+    task_run_context = TaskRunContext.get()
+    if task_run_context is not None:
+        ids["prefect.task_run.id"] = str(task_run_context.task_run.id)
+    return ids
@@ -0,0 +1,232 @@
+"""Pools of running AI Training jobs leased to short work items"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from ov_hcloud_ai_solution_client import AuthenticatedClient
+from ov_hcloud_ai_solution_client.api.job import job_get, job_kill, job_new
+from ov_hcloud_ai_solution_client.models import JobSpec
+
+from prefect_ovh.client import call_api
+from prefect_ovh.jobs import JOB_TERMINAL_STATES
+
+WARM_POOL_LABEL = "prefect-ovh-warm-pool"
+
+
+class PooledJob:
+    """A job of a `WarmJobPool`
+
+    Attributes:
+        id (str): the id of the job
+        state (str): the last known state of the job
+        url (str): the url serving the `defaultHttpPort` of the job, once it runs
+        leased (bool): whether a work item is using the job
+        idle_since (float): the monotonic time of the last release
+    """
+
+    def __init__(self, id: str):
+        self.id = id
+        self.state = "QUEUED"
+        self.url: Optional[str] = None
+        self.leased = False
+        self.idle_since = time.monotonic()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the job runs and can be leased"""
+        return self.state == "RUNNING" and not self.leased
+
+    def __repr__(self) -> str:
+        """Show the id, the state and the lease of the job"""
+        return f"PooledJob(id={self.id!r}, state={self.state!r}, leased={self.leased})"
+
+
+class WarmJobPool:
+    """Keeps jobs of a spec running so that work items skip their cold start
+
+    The pool submits up to `size` jobs and leases the running ones to work
+    items, which reach them through their `url`, e.g. an inference server
+    listening on the `defaultHttpPort` of the spec. A released job waits for
+    the next lease; `recycle` kills the jobs idle for more than `idle_ttl`
+    seconds, keeping `min_size` of them, and forgets the jobs that ended.
+
+    Args:
+        client (AuthenticatedClient): an authenticated client
+        job_spec (Dict[str, Any]): the JobSpec of the jobs, in the API format
+        size (int): the maximum number of jobs of the pool
+        min_size (int): the number of idle jobs kept by `recycle`
+        idle_ttl (float): the seconds after which an idle job is killed
+        poll_interval (float): the seconds between two polls while waiting
+        name (str): the name of the pool, set as a label of its jobs
+
+    Example:
+        Send work items to warm inference servers:
+        ```python
+        with WarmJobPool(client, spec, size=4) as pool:
+            with pool.leased() as job:
+                httpx.post(f"{job.url}/predict", json=item)
+        ```
+    """
+
+    def __init__(
+        self,
+        client: AuthenticatedClient,
+        job_spec: Dict[str, Any],
+        size: int = 1,
+        min_size: int = 0,
+        idle_ttl: float = 600,
+        poll_interval: float = 5,
+        name: str = "default",
+    ):
+        self.client = client
+        self.job_spec = {
+            **job_spec,
+            "labels": {**job_spec.get("labels", {}), WARM_POOL_LABEL: name},
+        }
+        self.size = size
+        self.min_size = min_size
+        self.idle_ttl = idle_ttl
+        self.poll_interval = poll_interval
+        self.jobs: List[PooledJob] = []
+        self._lock = threading.Lock()
+        # the jobs being submitted, counted so that concurrent fills do not
+        # submit more than `size` jobs
+        self._submitting = 0
+
+    def fill(self) -> None:
+        """Submit jobs until the pool has `size` of them
+
+        The jobs are submitted without holding the lock of the pool, so that
+        leases and releases are not blocked by the API calls.
+        """
+        with self._lock:
+            missing = max(0, self.size - len(self.jobs) - self._submitting)
+            self._submitting += missing
+        submitted = 0
+        try:
+            for _ in range(missing):
+                response = call_api(
+                    job_new, self.client, json_body=JobSpec.from_dict(self.job_spec)
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(
+                        f"Failed to submit a job of the pool: "
+                        f"{response.content.decode()}"
+                    )
+                job = PooledJob(json.loads(response.content)["id"])
+                with self._lock:
+                    self.jobs.append(job)
+                    self._submitting -= 1
+                submitted += 1
+        finally:
+            with self._lock:
+                self._submitting -= missing - submitted
+
+    def refresh(self) -> None:
+        """Update the state of the jobs not leased and drop the ended ones
+
+        Running jobs are polled too, since an idle job can end or be killed
+        out of the pool and must not be leased anymore.
+        """
+        with self._lock:
+            jobs = [job for job in self.jobs if not job.leased]
+        for job in jobs:
+            response = call_api(job_get, self.client, id=job.id)
+            if response.status_code != 200:
+                continue
+            status = json.loads(response.content)["status"]
+            job.state = status["state"]
+            job.url = status.get("url")
+        with self._lock:
+            self.jobs = [
+                job for job in self.jobs if job.state not in JOB_TERMINAL_STATES
+            ]
+
+    def lease(self, timeout: Optional[float] = None) -> PooledJob:
+        """Reserve a running job, starting jobs if none is available
+
+        Args:
+            timeout (float): the maximum seconds to wait, forever if not set
+
+        Raises:
+            TimeoutError: if no job is available after `timeout`
+
+        Returns:
+            PooledJob: the job, to give back with `release`
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                for job in self.jobs:
+                    if job.ready:
+                        job.leased = True
+                        return job
+            self.fill()
+            self.refresh()
+            with self._lock:
+                if any(job.ready for job in self.jobs):
+                    continue
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"No job of the pool was ready after {timeout}s")
+            time.sleep(self.poll_interval)
+
+    def release(self, job: PooledJob) -> None:
+        """Give back a leased job to the pool
+
+        Args:
+            job (PooledJob): the job returned by `lease`
+        """
+        with self._lock:
+            job.leased = False
+            job.idle_since = time.monotonic()
+
+    @contextmanager
+    def leased(self, timeout: Optional[float] = None) -> Iterator[PooledJob]:
+        """Lease a job for the duration of a `with` block
+
+        Args:
+            timeout (float): the maximum seconds to wait, forever if not set
+
+        Yields:
+            PooledJob: the job
+        """
+        job = self.lease(timeout)
+        try:
+            yield job
+        finally:
+            self.release(job)
+
+    def recycle(self) -> List[str]:
+        """Kill the jobs idle for too long and forget the ended ones
+
+        Returns:
+            List[str]: the ids of the jobs killed
+        """
+        self.refresh()
+        now = time.monotonic()
+        with self._lock:
+            idle = [job for job in self.jobs if not job.leased]
+            expired = [job for job in idle if now - job.idle_since > self.idle_ttl]
+            expired = expired[: max(0, len(idle) - self.min_size)]
+            self.jobs = [job for job in self.jobs if job not in expired]
+        for job in expired:
+            call_api(job_kill, self.client, id=job.id)
+        return [job.id for job in expired]
+
+    def close(self) -> None:
+        """Kill every job of the pool"""
+        with self._lock:
+            jobs, self.jobs = self.jobs, []
+        for job in jobs:
+            call_api(job_kill, self.client, id=job.id)
+
+    def __enter__(self) -> "WarmJobPool":
+        """Fill the pool"""
+        self.fill()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Kill every job of the pool"""
+        self.close()
@@ -26,7 +26,7 @@ setup(
     packages=find_packages(exclude=("tests", "docs")),
     python_requires=">=3.8",
     install_requires=install_requires,
-    extras_require={"dev": dev_requires},
+    extras_require={"dev": dev_requires, "tracing": ["opentelemetry-api"]},
     entry_points={
         "prefect.collections": [
             "prefect_ovh = prefect_ovh",
@@ -20,3 +20,79 @@ def reset_object_registry():
 
     with PrefectObjectRegistry():
         yield
+
+
+@pytest.fixture(autouse=True)
+def reset_job_cache():
+    """
+    Ensures each test starts with an empty job cache.
+    """
+    from prefect_ovh.cache import get_job_cache
+
+    get_job_cache().clear()
+    yield
+
+
+@pytest.fixture(scope="session")
+def s3_endpoint():
+    """
+    Runs a local S3 compatible server standing in for OVHcloud Object Storage.
+    """
+    import socket
+
+    from moto.server import ThreadedMotoServer
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def object_storage(s3_endpoint, request):
+    """
+    An object storage block using a new container of the local S3 server.
+    """
+    import boto3
+
+    from prefect_ovh.object_storage import OvhcloudObjectStorage
+
+    bucket = request.node.name.lower().replace("_", "-")[:63]
+    boto3.client(
+        "s3",
+        endpoint_url=s3_endpoint,
+        region_name="gra",
+        aws_access_key_id="access",
+        aws_secret_access_key="secret",
+    ).create_bucket(
+        Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": "gra"}
+    )
+    return OvhcloudObjectStorage(
+        bucket=bucket,
+        endpoint_url=s3_endpoint,
+        access_key_id="access",
+        secret_access_key="secret",
+        part_size=5 * 1024 * 1024,
+        max_concurrency=4,
+    )
+
+
+@pytest.fixture
+def mock_client():
+    """
+    Builds authenticated clients whose requests are answered by a handler.
+    """
+    import httpx
+    from ov_hcloud_ai_solution_client import AuthenticatedClient
+
+    def build(handler, base_url="http://localhost"):
+        return AuthenticatedClient(
+            base_url=base_url,
+            token="token",
+            httpx_args={"transport": httpx.MockTransport(handler)},
+        )
+
+    return build
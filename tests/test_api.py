@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from prefect_ovh.api import OvhAIClient
+from prefect_ovh.fake_api import FakeAITrainingAPI
+
+STATE_DURATIONS = (("QUEUED", 0.05), ("RUNNING", 0.2))
+SPEC = {"image": "ubuntu", "command": ["true"], "resources": {"gpu": 1}}
+
+
+@pytest.fixture
+def api():
+    with FakeAITrainingAPI(
+        token="token", state_durations=STATE_DURATIONS, log_interval=0.05
+    ) as api:
+        yield api
+
+
+@pytest.fixture
+def ovh(api):
+    return OvhAIClient.from_token("token", base_url=api.url)
+
+
+def test_methods_run_outside_of_flows(api, ovh):
+    job = json.loads(ovh.create_job(SPEC))
+    assert ovh.get_job(job["id"], as_model=True).id == job["id"]
+    result = ovh.wait_for_job_state(job["id"], poll_interval=0.02)
+    assert result["state"] == "DONE"
+    assert len(ovh.get_logs(job["id"]).splitlines()) == 4
+    assert ovh.list_jobs(state="DONE", as_model=True)[0].id == job["id"]
+    assert json.loads(ovh.me())["user"] == "fake-user"
+
+
+def test_get_job_uses_the_job_cache(api, ovh):
+    job_id = json.loads(ovh.create_job(SPEC))["id"]
+    for _ in range(100):
+        ovh.get_job(job_id)
+    assert api.request_counts["job_get"] == 1
+    ovh.kill_job(job_id)
+    assert json.loads(ovh.get_job(job_id))["status"]["state"] == "INTERRUPTING"
+
+
+def test_create_jobs_reports_each_submission(ovh):
+    results = ovh.create_jobs([SPEC, {"command": ["true"]}], max_concurrency=2)
+    assert results[0]["status_code"] == 200
+    assert results[1]["status_code"] == 400
+    assert results[1]["job"] is None
+
+
+async def test_async_methods(api, ovh):
+    job = json.loads(await ovh.create_job_async(SPEC))
+    result = await ovh.wait_for_job_state_async(
+        job["id"], target_states=["RUNNING"], poll_interval=0.02
+    )
+    assert result["state"] == "RUNNING"
+    assert (await ovh.get_job_async(job["id"], as_model=True)).id == job["id"]
+    assert len(await ovh.list_jobs_async(limit=1)) == 1
@@ -0,0 +1,58 @@
+import pickle
+
+import pytest
+
+from prefect_ovh import blocks
+from prefect_ovh.blocks import OvhcloudCredentials
+from prefect_ovh.client import close_pooled_clients, resolve_client, use_client
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    close_pooled_clients()
+    blocks._loaded_blocks.clear()
+    yield
+    close_pooled_clients()
+    blocks._loaded_blocks.clear()
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Counts the loads of blocks from the Prefect API"""
+    names = []
+
+    async def load(cls, name):
+        names.append(name)
+        return cls(token="token", region="bhs")
+
+    monkeypatch.setattr(OvhcloudCredentials, "load", classmethod(load))
+    return names
+
+
+def test_get_client_returns_the_pooled_client():
+    credentials = OvhcloudCredentials(token="secret", region="bhs", timeout=12)
+    client = credentials.get_client()
+    assert client is credentials.get_client()
+    assert client._base_url == "https://bhs.training.ai.cloud.ovh.net"
+    assert client.get_httpx_client().timeout.read == 12
+    assert "secret" not in repr(credentials)
+
+
+def test_credentials_resolve_as_a_client():
+    credentials = OvhcloudCredentials(token="token")
+    shipped = pickle.loads(pickle.dumps(credentials))
+    with use_client(shipped):
+        assert resolve_client() is credentials.get_client()
+
+
+def test_load_cached_reuses_the_block(loads):
+    first = OvhcloudCredentials.load_cached("prod")
+    assert OvhcloudCredentials.load_cached("prod") is first
+    assert OvhcloudCredentials.load_cached("other") is not first
+    assert loads == ["prod", "other"]
+
+
+async def test_load_cached_expires(loads):
+    first = await OvhcloudCredentials.load_cached("prod", ttl=0)
+    assert await OvhcloudCredentials.load_cached("prod", ttl=0) is not first
+    assert loads == ["prod", "prod"]
@@ -0,0 +1,90 @@
+import json
+
+import httpx
+from ov_hcloud_ai_solution_client.models import Job
+from ov_hcloud_ai_solution_client.types import Response
+from prefect import flow
+
+from prefect_ovh.cache import JobCache, configure_job_cache, get_job_cache
+from prefect_ovh.tasks import get_infos_of_job, stop_an_existing_job
+
+
+def job_response(state, status_code=200):
+    job = {"id": "job-id", "status": {"state": state}}
+    return Response(
+        status_code=status_code,
+        content=json.dumps(job).encode(),
+        headers={},
+        parsed=Job.from_dict(job) if status_code == 200 else None,
+    )
+
+
+def test_job_cache_hit_and_miss():
+    cache = JobCache(ttl=60)
+    assert cache.get("job") is None
+    response = job_response("RUNNING")
+    cache.put("job", response)
+    assert cache.get("job") is response
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_job_cache_expires_running_jobs():
+    cache = JobCache(ttl=0)
+    cache.put("job", job_response("RUNNING"))
+    assert cache.get("job") is None
+    assert len(cache) == 0
+
+
+def test_job_cache_keeps_terminal_jobs():
+    cache = JobCache(ttl=0)
+    response = job_response("DONE")
+    cache.put("job", response)
+    assert cache.get("job") is response
+
+
+def test_job_cache_ignores_errors():
+    cache = JobCache()
+    cache.put("job", job_response("RUNNING", status_code=404))
+    assert len(cache) == 0
+
+
+def test_job_cache_evicts_least_recently_used():
+    cache = JobCache(maxsize=2)
+    cache.put("first", job_response("DONE"))
+    cache.put("second", job_response("DONE"))
+    cache.get("first")
+    cache.put("third", job_response("DONE"))
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+
+
+def test_configure_job_cache():
+    cache = configure_job_cache(ttl=1, maxsize=10)
+    assert get_job_cache() is cache
+    assert (cache.ttl, cache.maxsize) == (1, 10)
+    configure_job_cache()
+
+
+def test_get_infos_of_job_uses_cache(mock_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": "job-id", "status": {"state": "DONE"}})
+
+    client = mock_client(handler)
+
+    @flow
+    def test_flow():
+        get_infos_of_job("job-id", client)
+        get_infos_of_job("job-id", client)
+        stop_an_existing_job("job-id", client)
+        get_infos_of_job("job-id", client)
+
+    test_flow()
+    assert [request.url.path for request in requests] == [
+        "/v1/job/job-id",
+        "/v1/job/job-id/kill",
+        "/v1/job/job-id",
+    ]
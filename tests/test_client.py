@@ -0,0 +1,207 @@
+import asyncio
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.api.job import job_get, job_kill
+from ov_hcloud_ai_solution_client.api.me import me
+
+from prefect_ovh import client as client_module
+from prefect_ovh.client import (
+    ClientHandle,
+    acall_api,
+    call_api,
+    close_async_pooled_clients,
+    close_pooled_clients,
+    get_async_client_for,
+    get_async_pooled_client,
+    get_pooled_client,
+    resolve_client,
+    use_client,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_pool():
+    close_pooled_clients()
+    yield
+    close_pooled_clients()
+
+
+def test_get_pooled_client_is_shared():
+    first = get_pooled_client(token="token", base_url="http://localhost")
+    second = get_pooled_client(token="token", base_url="http://localhost")
+    assert first is second
+
+
+def test_get_pooled_client_keyed_by_token_and_base_url():
+    first = get_pooled_client(token="token", base_url="http://localhost")
+    other_token = get_pooled_client(token="other", base_url="http://localhost")
+    other_url = get_pooled_client(token="token", base_url="http://127.0.0.1")
+    assert len({id(first), id(other_token), id(other_url)}) == 3
+
+
+def test_get_pooled_client_keyed_by_pool_settings():
+    first = get_pooled_client(token="token", base_url="http://localhost")
+    other_timeout = get_pooled_client(
+        token="token", base_url="http://localhost", timeout=5
+    )
+    other_limits = get_pooled_client(
+        token="token", base_url="http://localhost", max_connections=10
+    )
+    assert len({id(first), id(other_timeout), id(other_limits)}) == 3
+    assert other_timeout.get_httpx_client().timeout == httpx.Timeout(5)
+    same = get_pooled_client(token="token", base_url="http://localhost", timeout=5)
+    assert same is other_timeout
+
+
+def test_close_pooled_clients_empties_registry():
+    client = get_pooled_client(token="token", base_url="http://localhost")
+    httpx_client = client.get_httpx_client()
+    close_pooled_clients()
+    assert httpx_client.is_closed
+    assert client_module._clients == {}
+    assert get_pooled_client(token="token", base_url="http://localhost") is not client
+
+
+def test_client_handle_resolves_the_pooled_client_after_pickling(monkeypatch):
+    handle = ClientHandle(token_env="OVH_AI_TOKEN", region="bhs")
+    shipped = pickle.loads(pickle.dumps(handle))
+    monkeypatch.setenv("OVH_AI_TOKEN", "token")
+    client = resolve_client(shipped)
+    assert client is get_pooled_client(
+        token="token", base_url="https://bhs.training.ai.cloud.ovh.net"
+    )
+    assert resolve_client(client) is client
+
+
+def test_client_handle_hides_its_token():
+    assert "secret" not in repr(ClientHandle(token="secret"))
+    with pytest.raises(ValueError):
+        ClientHandle()
+
+
+def test_use_client_sets_the_default_client():
+    client = get_pooled_client(token="token", base_url="http://localhost")
+    with pytest.raises(RuntimeError):
+        resolve_client()
+    with use_client(client):
+        assert resolve_client() is client
+        with use_client(ClientHandle(token="other", base_url="http://localhost")):
+            assert resolve_client() is not client
+        assert resolve_client() is client
+    with pytest.raises(RuntimeError):
+        resolve_client()
+
+
+async def test_get_async_pooled_client_is_shared_within_loop():
+    first = get_async_pooled_client(token="token", base_url="http://localhost")
+    second = get_async_pooled_client(token="token", base_url="http://localhost")
+    assert first is second
+    assert first is not get_pooled_client(token="token", base_url="http://localhost")
+    await close_async_pooled_clients()
+
+
+async def test_get_async_client_for_matches_sync_client():
+    client = get_pooled_client(token="token", base_url="http://localhost")
+    async_client = get_async_client_for(client)
+    assert async_client.token == "token"
+    assert async_client is get_async_pooled_client(
+        token="token", base_url="http://localhost"
+    )
+    httpx_client = async_client.get_async_httpx_client()
+    await close_async_pooled_clients()
+    assert httpx_client.is_closed
+
+
+async def test_get_async_client_for_keeps_client_settings(mock_client):
+    client = mock_client(lambda request: httpx.Response(204))
+    async_client = get_async_client_for(client)
+    assert async_client is get_async_client_for(client)
+    response = await async_client.get_async_httpx_client().get("/v1/info")
+    assert response.status_code == 204
+    assert response.request.headers["Authorization"] == "Bearer token"
+    await close_async_pooled_clients()
+
+
+def throttled_client(mock_client, statuses):
+    """A client answering with the given statuses, then with 200"""
+    statuses = iter(statuses)
+
+    def handler(request):
+        status = next(statuses, 200)
+        return httpx.Response(status, headers={"Retry-After": "0"}, json={})
+
+    return mock_client(handler, base_url="http://throttled")
+
+
+def test_call_api_retries_throttled_requests(mock_client):
+    response = call_api(me, throttled_client(mock_client, [429, 429]))
+    assert response.status_code == 200
+
+
+def test_call_api_gives_up_after_max_retries(mock_client):
+    response = call_api(me, throttled_client(mock_client, [429, 429]), max_retries=1)
+    assert response.status_code == 429
+
+
+async def test_acall_api_retries_throttled_requests(mock_client):
+    response = await acall_api(me, throttled_client(mock_client, [429]))
+    assert response.status_code == 200
+    await close_async_pooled_clients()
+
+
+def counting_client(mock_client, delay):
+    """A client answering slowly and recording the requests it receives"""
+    requests = []
+    lock = threading.Lock()
+
+    def handler(request):
+        with lock:
+            requests.append(request.url.path)
+        time.sleep(delay)
+        return httpx.Response(200, json={"id": "job-id", "status": {"state": "DONE"}})
+
+    client = mock_client(handler, base_url="http://coalesced")
+    return client, requests
+
+
+def test_call_api_coalesces_concurrent_reads(mock_client):
+    client, requests = counting_client(mock_client, delay=0.2)
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [
+            executor.submit(call_api, job_get, client, id="job-id") for _ in range(5)
+        ]
+        responses = [future.result() for future in futures]
+    assert all(response.status_code == 200 for response in responses)
+    assert len(requests) < 5
+
+
+def test_call_api_does_not_coalesce_writes(mock_client):
+    client, requests = counting_client(mock_client, delay=0.1)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        for future in [
+            executor.submit(call_api, job_kill, client, id="job-id") for _ in range(3)
+        ]:
+            future.result()
+    assert len(requests) == 3
+
+
+async def test_acall_api_coalesces_concurrent_reads(mock_client):
+    requests = []
+
+    async def handler(request):
+        requests.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"id": "job-id", "status": {"state": "DONE"}})
+
+    client = mock_client(handler, base_url="http://coalesced")
+    await asyncio.gather(
+        *(acall_api(job_get, client, id="job-id") for _ in range(5)),
+        acall_api(job_get, client, id="other-id"),
+    )
+    assert sorted(requests) == ["/v1/job/job-id", "/v1/job/other-id"]
+    await close_async_pooled_clients()
@@ -0,0 +1,48 @@
+import json
+
+import httpx
+from prefect import flow
+
+from prefect_ovh.tasks import create_jobs_bulk, create_jobs_bulk_async
+
+
+def handler(request):
+    spec = json.loads(request.content)
+    if spec["image"] == "broken":
+        return httpx.Response(400, json={"message": "invalid image"})
+    return httpx.Response(200, json={"id": spec["image"], "spec": spec})
+
+
+SPECS = [
+    {"image": "first", "resources": {"gpu": 1}},
+    {"image": "broken", "resources": {"gpu": 1}},
+    {"image": "third", "resources": {"gpu": 1}},
+]
+
+
+def check_results(results):
+    assert [result["status_code"] for result in results] == [200, 400, 200]
+    assert json.loads(results[0]["job"])["id"] == "first"
+    assert results[1]["job"] is None
+    assert "invalid image" in results[1]["error"]
+    assert json.loads(results[2]["job"])["id"] == "third"
+
+
+def test_create_jobs_bulk(mock_client):
+    client = mock_client(handler)
+
+    @flow
+    def test_flow():
+        return create_jobs_bulk(SPECS, client, max_concurrency=2)
+
+    check_results(test_flow())
+
+
+async def test_create_jobs_bulk_async(mock_client):
+    client = mock_client(handler)
+
+    @flow
+    async def test_flow():
+        return await create_jobs_bulk_async(SPECS, client, max_concurrency=2)
+
+    check_results(await test_flow())
@@ -0,0 +1,131 @@
+import json
+
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.api.job import job_get
+from prefect import flow
+
+from prefect_ovh.client import ClientHandle, call_api, use_client
+from prefect_ovh.fake_api import FakeAITrainingAPI
+from prefect_ovh.tasks import (
+    create_a_job,
+    create_a_job_async,
+    create_client,
+    get_infos_of_job,
+    get_infos_of_job_async,
+    get_logs_of_job,
+    hello_prefect_ovh,
+    list_jobs,
+    start_an_existing_job,
+    stop_an_existing_job,
+    wait_for_job_state,
+)
+
+STATE_DURATIONS = (("QUEUED", 0.05), ("RUNNING", 0.3))
+
+
+@flow
+def wait_flow(job_id, client):
+    return wait_for_job_state(job_id, client, poll_interval=0.05)
+
+
+@pytest.fixture
+def api():
+    with FakeAITrainingAPI(
+        token="token", state_durations=STATE_DURATIONS, log_interval=0.05
+    ) as api:
+        yield api
+
+
+@pytest.fixture
+def client(api):
+    return create_client.fn(token="token", base_url=api.url)
+
+
+def test_job_lifecycle(api, client):
+    job = json.loads(create_a_job.fn(client, image="ubuntu", command=["true"]))
+    assert job["status"]["state"] == "QUEUED"
+    result = wait_flow(job["id"], client)
+    assert result["state"] == "DONE"
+    assert json.loads(result["job"])["status"]["exitCode"] == 0
+    assert [state for state, _ in result["transitions"]][-1] == "DONE"
+    logs = get_logs_of_job.fn(job["id"], client).splitlines()
+    assert len(logs) == 6
+    assert logs[0].endswith(f"[{job['id']}] line 0")
+    assert api.request_counts["job_new"] == 1
+
+
+def test_kill_and_restart(client):
+    job_id = json.loads(create_a_job.fn(client, image="ubuntu"))["id"]
+    stop_an_existing_job.fn(job_id, client)
+    result = wait_flow(job_id, client)
+    assert result["state"] == "INTERRUPTED"
+    restarted = json.loads(start_an_existing_job.fn(job_id, client))
+    assert restarted["status"]["state"] == "QUEUED"
+
+
+def test_list_jobs_filters():
+    with FakeAITrainingAPI(state_durations=(("QUEUED", 60),)) as api:
+        client = create_client.fn(token="token", base_url=api.url)
+        create_a_job.fn(client, image="ubuntu", dicLabels={"team": "vision"})
+        create_a_job.fn(client, image="ubuntu", dicLabels={"team": "nlp"})
+        jobs = list_jobs.fn(client, labels={"team": "vision"}, state="QUEUED")
+        assert [job["spec"]["labels"] for job in jobs] == [{"team": "vision"}]
+        assert list_jobs.fn(client, state="RUNNING") == []
+        assert len(list_jobs.fn(client, page_size=1)) == 2
+
+
+def test_me(client):
+    assert json.loads(hello_prefect_ovh.fn(client))["user"] == "fake-user"
+
+
+def test_unknown_job_and_token(api, client):
+    assert call_api(job_get, client, id="missing").status_code == 404
+    other = create_client.fn(token="other", base_url=api.url)
+    assert call_api(job_get, other, id="missing").status_code == 401
+
+
+async def test_async_tasks(client):
+    job = json.loads(await create_a_job_async.fn(client, image="ubuntu"))
+    infos = json.loads(await get_infos_of_job_async.fn(job["id"], client))
+    assert infos["id"] == job["id"]
+
+
+def test_rate_limit():
+    with FakeAITrainingAPI(rate_limit=5) as api:
+        with httpx.Client(base_url=api.url) as http:
+            responses = [http.get("/v1/info") for _ in range(10)]
+    statuses = [response.status_code for response in responses]
+    assert statuses[:5] == [200] * 5
+    throttled = responses[statuses.index(429)]
+    assert float(throttled.headers["Retry-After"]) > 0
+
+
+def test_errors_and_failing_jobs():
+    with FakeAITrainingAPI(error_rate=1.0) as api:
+        assert httpx.get(f"{api.url}/v1/info").status_code == 503
+    with FakeAITrainingAPI(
+        job_failure_rate=1.0, state_durations=STATE_DURATIONS
+    ) as api:
+        client = create_client.fn(token="token", base_url=api.url)
+        job_id = json.loads(create_a_job.fn(client, image="ubuntu"))["id"]
+        result = wait_flow(job_id, client)
+    assert result["state"] == "FAILED"
+    assert json.loads(result["job"])["status"]["exitCode"] == 1
+
+
+def test_tasks_accept_a_client_handle(api):
+    handle = ClientHandle(token="token", base_url=api.url)
+    job_id = json.loads(create_a_job.fn(handle, image="ubuntu"))["id"]
+    assert wait_flow(job_id, handle)["state"] == "DONE"
+
+
+def test_tasks_use_the_client_of_the_flow(api):
+    @flow
+    def poll_flow():
+        with use_client(ClientHandle(token="token", base_url=api.url)):
+            job_id = json.loads(create_a_job(image="ubuntu"))["id"]
+            infos = get_infos_of_job.submit(job_id, use_cache=False).result()
+            return json.loads(infos)["id"] == job_id
+
+    assert poll_flow()
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+import pytest
+
+import prefect_ovh
+
+CHECK_IMPORT = """
+import sys
+
+import prefect_ovh
+
+heavy = [
+    "boto3",
+    "ov_hcloud_ai_solution_client.api.job",
+    "ov_hcloud_ai_solution_client.models",
+    "prefect_ovh.flows",
+    "prefect_ovh.tasks",
+]
+loaded = [name for name in heavy if name in sys.modules]
+assert loaded == [], loaded
+prefect_ovh.OvhcloudCredentials(token="token").get_client()
+assert "prefect_ovh.tasks" not in sys.modules
+assert prefect_ovh.create_a_job.fn
+assert "ov_hcloud_ai_solution_client.api.job" in sys.modules
+"""
+
+
+def test_import_defers_the_sdk_and_the_tasks():
+    # a fresh interpreter, as the tests already imported the whole package
+    subprocess.run([sys.executable, "-c", CHECK_IMPORT], check=True)
+
+
+def test_lazy_attributes():
+    from prefect_ovh.api import OvhAIClient
+    from prefect_ovh.flows import hello_world
+    from prefect_ovh.tasks import wait_for_job_state
+
+    assert prefect_ovh.OvhAIClient is OvhAIClient
+    assert prefect_ovh.hello_world is hello_world
+    assert prefect_ovh.wait_for_job_state is wait_for_job_state
+    assert "list_jobs" in dir(prefect_ovh)
+    with pytest.raises(AttributeError):
+        prefect_ovh.missing
@@ -0,0 +1,123 @@
+import json
+import logging
+
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from prefect.exceptions import InfrastructureNotFound
+
+try:
+    from prefect_ovh import infrastructure
+    from prefect_ovh.infrastructure import OvhcloudAITrainingJob
+except ImportError:
+    # the infrastructure blocks were removed by Prefect 3
+    pytest.skip("requires Prefect 2", allow_module_level=True)
+
+
+@pytest.fixture
+def api(mock_client, monkeypatch):
+    """Serve a fake AI Training API to the block, recording submitted specs
+
+    The job goes through `states`, staying in the last one.
+    """
+    state = {"specs": [], "states": [{"state": "DONE"}], "killed": [], "status": 200}
+
+    def handler(request):
+        path = request.url.path
+        if request.method == "POST" and path == "/v1/job":
+            state["specs"].append(json.loads(request.content))
+            return httpx.Response(200, json={"id": "job-id"})
+        if path == "/v1/job/job-id/kill":
+            state["killed"].append("job-id")
+            return httpx.Response(200, json={"id": "job-id"})
+        if path == "/v1/job/job-id/log":
+            return httpx.Response(200, content=b"hello from the job\n")
+        if path == "/v1/job/job-id":
+            if state["status"] != 200:
+                return httpx.Response(state["status"], json={"message": "error"})
+            status = state["states"][0]
+            if len(state["states"]) > 1:
+                state["states"].pop(0)
+            return httpx.Response(200, json={"id": "job-id", "status": status})
+        return httpx.Response(404, json={"message": "not found"})
+
+    client = mock_client(handler)
+    monkeypatch.setattr(infrastructure, "get_pooled_client", lambda *args: client)
+    return state
+
+
+def test_build_job_spec_merges_template():
+    job = OvhcloudAITrainingJob(
+        token="token",
+        image="my/flows:latest",
+        gpu=2,
+        env={"FOO": "bar"},
+        labels={"prefect.io/flow-run-id": "1234"},
+        name="my flow run",
+        job_spec={"labels": {"team": "ml"}, "resources": {"flavor": "ai1-1-gpu"}},
+    )
+    spec = job.build_job_spec()
+    assert spec["image"] == "my/flows:latest"
+    assert spec["command"] == job._base_flow_run_command()
+    assert spec["resources"] == {"flavor": "ai1-1-gpu", "gpu": 2}
+    assert {"name": "FOO", "value": "bar"} in spec["envVars"]
+    assert spec["labels"] == {"team": "ml", "prefect.io-flow-run-id": "1234"}
+    assert spec["name"] == "my-flow-run"
+    assert json.loads(job.preview()) == spec
+
+
+def test_build_job_spec_cpu_replaces_gpu():
+    spec = OvhcloudAITrainingJob(token="token", cpu=4).build_job_spec()
+    assert spec["resources"] == {"cpu": 4, "gpu": 0}
+
+
+async def test_run_returns_exit_code(api, capsys):
+    result = await OvhcloudAITrainingJob(token="token", poll_interval=0).run()
+    assert result.identifier == "job-id"
+    assert result.status_code == 0
+    assert api["specs"][0]["image"]
+    assert "hello from the job" in capsys.readouterr().err
+
+
+async def test_run_logs_state_changes(api, caplog):
+    api["states"] = [{"state": "QUEUED"}, {"state": "RUNNING"}, {"state": "DONE"}]
+    caplog.set_level(logging.INFO)
+    await OvhcloudAITrainingJob(
+        token="token", poll_interval=0, stream_output=False
+    ).run()
+    states = [
+        record.getMessage().rsplit(" ", 1)[-1]
+        for record in caplog.records
+        if record.getMessage().startswith("AI Training job 'job-id' is")
+    ]
+    assert states == ["QUEUED", "RUNNING", "DONE"]
+
+
+async def test_run_kills_the_job_on_timeout(api):
+    api["states"] = [{"state": "RUNNING"}]
+    job = OvhcloudAITrainingJob(
+        token="token", poll_interval=0.01, job_watch_timeout_seconds=0
+    )
+    with pytest.raises(TimeoutError):
+        await job.run()
+    assert api["killed"] == ["job-id"]
+
+
+async def test_run_raises_when_the_job_cannot_be_read(api):
+    api["status"] = 401
+    job = OvhcloudAITrainingJob(token="token", poll_interval=0, stream_output=False)
+    with pytest.raises(UnexpectedStatus):
+        await job.run()
+
+
+async def test_run_reports_failed_job(api):
+    api["states"] = [{"state": "FAILED", "exitCode": 3}]
+    result = await OvhcloudAITrainingJob(
+        token="token", poll_interval=0, stream_output=False
+    ).run()
+    assert result.status_code == 3
+
+
+async def test_kill_unknown_job(api):
+    with pytest.raises(InfrastructureNotFound):
+        await OvhcloudAITrainingJob(token="token").kill("unknown-id")
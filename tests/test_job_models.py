@@ -0,0 +1,76 @@
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from ov_hcloud_ai_solution_client.models import Job, Me
+from prefect import flow
+
+from prefect_ovh.tasks import (
+    get_infos_of_job,
+    get_infos_of_job_async,
+    hello_prefect_ovh,
+)
+
+JOB = {
+    "id": "job-id",
+    "spec": {"image": "bash", "resources": {"cpu": 1, "gpu": 0}},
+    "status": {"state": "RUNNING"},
+}
+
+
+def handler(request):
+    if request.url.path == "/v1/info":
+        return httpx.Response(200, json={"user": "user"})
+    return httpx.Response(200, json=JOB)
+
+
+def test_get_infos_of_job_returns_json_by_default(mock_client):
+    client = mock_client(handler)
+
+    @flow
+    def test_flow():
+        return get_infos_of_job("job-id", client)
+
+    assert isinstance(test_flow(), str)
+
+
+def test_get_infos_of_job_as_model(mock_client):
+    client = mock_client(handler)
+
+    @flow
+    def test_flow():
+        return get_infos_of_job("job-id", client, as_model=True)
+
+    job = test_flow()
+    assert isinstance(job, Job)
+    assert job.id == "job-id"
+
+
+def test_get_infos_of_job_as_model_raises_on_error(mock_client):
+    client = mock_client(lambda request: httpx.Response(404, json={"message": "?"}))
+
+    @flow
+    def test_flow():
+        return get_infos_of_job("job-id", client, as_model=True)
+
+    with pytest.raises(UnexpectedStatus):
+        test_flow()
+
+
+async def test_get_infos_of_job_async_as_model(mock_client):
+    client = mock_client(handler)
+
+    @flow
+    async def test_flow():
+        return await get_infos_of_job_async("job-id", client, as_model=True)
+
+    assert (await test_flow()).id == "job-id"
+
+
+def test_hello_prefect_ovh_as_model(mock_client):
+    client = mock_client(handler)
+
+    @flow
+    def test_flow():
+        return hello_prefect_ovh(client, as_model=True)
+
+    assert isinstance(test_flow(), Me)
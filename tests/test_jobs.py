@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from ov_hcloud_ai_solution_client.models import Job
+from ov_hcloud_ai_solution_client.types import Response
+from prefect import flow
+
+from prefect_ovh.jobs import iter_jobs, iter_jobs_async, job_state
+from prefect_ovh.tasks import list_jobs, list_jobs_async
+
+
+def paged_client(mock_client, total, status_code=200, max_size=None):
+    """A client listing `total` jobs and recording the query of each request
+
+    The pages have at most `max_size` jobs, whatever the size asked.
+    """
+
+    queries = []
+
+    def handler(request):
+        queries.append(dict(request.url.params))
+        page, size = int(request.url.params["page"]), int(request.url.params["size"])
+        size = min(size, max_size or size)
+        ids = range((page - 1) * size, min(page * size, total))
+        return httpx.Response(status_code, json=[{"id": str(i)} for i in ids])
+
+    client = mock_client(handler)
+    return client, queries
+
+
+def test_job_state():
+    job = {"status": {"state": "RUNNING"}}
+    response = Response(HTTPStatus.OK, json.dumps(job).encode(), {}, Job.from_dict(job))
+    assert job_state(response) == "RUNNING"
+    error = Response(HTTPStatus.SERVICE_UNAVAILABLE, b'{"message": "retry"}', {}, None)
+    assert job_state(error) is None
+
+
+def test_iter_jobs_goes_through_pages_lazily(mock_client):
+    client, queries = paged_client(mock_client, total=5)
+    jobs = iter_jobs(client, page_size=2)
+    assert next(jobs).id == "0"
+    assert len(queries) == 1
+    assert [job.id for job in jobs] == ["1", "2", "3", "4"]
+    assert [query["page"] for query in queries] == ["1", "2", "3", "4"]
+
+
+def test_iter_jobs_goes_through_pages_capped_by_the_api(mock_client):
+    client, queries = paged_client(mock_client, total=5, max_size=2)
+    assert [job.id for job in iter_jobs(client, page_size=100)] == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+    assert [query["page"] for query in queries] == ["1", "2", "3", "4"]
+
+
+def test_iter_jobs_sends_filters(mock_client):
+    client, queries = paged_client(mock_client, total=0)
+    list(
+        iter_jobs(
+            client,
+            labels={"team": "ml", "sweep": "42"},
+            state="RUNNING",
+            updated_after=datetime(2023, 1, 1, tzinfo=timezone.utc),
+        )
+    )
+    assert queries[0]["labelSelector"] == "team=ml,sweep=42"
+    assert queries[0]["statusState"] == "RUNNING"
+    assert queries[0]["updatedAfter"].startswith("2023-01-01")
+
+
+def test_iter_jobs_raises_on_error(mock_client):
+    client, _ = paged_client(mock_client, total=1, status_code=401)
+    with pytest.raises(UnexpectedStatus):
+        list(iter_jobs(client))
+
+
+async def test_iter_jobs_async(mock_client):
+    client, queries = paged_client(mock_client, total=3)
+    ids = [job.id async for job in iter_jobs_async(client, page_size=2)]
+    assert ids == ["0", "1", "2"]
+    assert len(queries) == 3
+
+
+def test_list_jobs_limit(mock_client):
+    client, queries = paged_client(mock_client, total=10)
+
+    @flow
+    def test_flow():
+        return list_jobs(client, page_size=3, limit=4)
+
+    jobs = test_flow()
+    assert [job["id"] for job in jobs] == ["0", "1", "2", "3"]
+    assert len(queries) == 2
+
+
+async def test_list_jobs_async_as_model(mock_client):
+    client, _ = paged_client(mock_client, total=3)
+
+    @flow
+    async def test_flow():
+        return await list_jobs_async(client, as_model=True)
+
+    assert [job.id for job in await test_flow()] == ["0", "1", "2"]
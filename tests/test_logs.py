@@ -0,0 +1,146 @@
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from prefect import flow
+
+from prefect_ovh import logs
+from prefect_ovh.logs import (
+    JobLogTail,
+    forget_log_tail,
+    get_log_tail,
+    tail_job_logs,
+    tail_job_logs_async,
+)
+from prefect_ovh.tasks import get_new_logs_of_job, mirror_logs_of_job
+
+
+@pytest.fixture(autouse=True)
+def clean_tails():
+    logs._tails.clear()
+    yield
+    logs._tails.clear()
+
+
+def growing_job_client(mock_client, logs, states):
+    """A client whose job log and job state move forward at every poll
+
+    An integer log or state is answered as an error with this status code.
+    """
+    logs, states = iter(logs), iter(states)
+    current = {}
+
+    def handler(request):
+        if request.url.path.endswith("/log"):
+            current["log"] = next(logs, current.get("log"))
+            if isinstance(current["log"], int):
+                return httpx.Response(current["log"], json={"message": "retry"})
+            return httpx.Response(200, content=current["log"])
+        current["state"] = next(states, current.get("state"))
+        if isinstance(current["state"], int):
+            return httpx.Response(current["state"], json={"message": "error"})
+        return httpx.Response(200, json={"status": {"state": current["state"]}})
+
+    return mock_client(handler)
+
+
+def test_job_log_tail_returns_only_new_complete_lines():
+    tail = JobLogTail("job-id")
+    assert tail.feed(b"first\nsec") == ["first"]
+    assert tail.feed(b"first\nsecond\nthird\n") == ["second", "third"]
+    assert tail.feed(b"first\nsecond\nthird\n") == []
+    assert tail.offset == len(b"first\nsecond\nthird\n")
+
+
+def test_job_log_tail_restarts_on_shorter_log():
+    tail = JobLogTail("job-id")
+    tail.feed(b"first\nsecond\n")
+    assert tail.feed(b"new\n") == ["new"]
+
+
+def test_job_log_tail_flush():
+    tail = JobLogTail("job-id")
+    assert tail.feed(b"first\nlast") == ["first"]
+    assert tail.flush() == ["last"]
+    assert tail.flush() == []
+
+
+def test_get_log_tail_is_shared_per_account(mock_client):
+    client = mock_client(None)
+    other = mock_client(None, base_url="http://other")
+    assert get_log_tail("job-id", client) is get_log_tail("job-id", client)
+    assert get_log_tail("job-id", other) is not get_log_tail("job-id", client)
+    forget_log_tail("job-id", client)
+    assert len(logs._tails) == 1
+
+
+def test_get_log_tail_keeps_the_recent_tails(mock_client, monkeypatch):
+    monkeypatch.setattr(logs, "MAX_TAILS", 2)
+    client = mock_client(None)
+    first = get_log_tail("first", client)
+    get_log_tail("second", client)
+    get_log_tail("first", client)
+    get_log_tail("third", client)
+    assert get_log_tail("first", client) is first
+    assert len(logs._tails) == 2
+
+
+def test_tail_job_logs_follows_until_job_is_over(mock_client):
+    client = growing_job_client(
+        mock_client, [b"a\n", b"a\nb\nc", b"a\nb\nc\nd"], ["RUNNING", "DONE"]
+    )
+    lines = list(tail_job_logs("job-id", client, poll_interval=0))
+    assert lines == ["a", "b", "c", "d"]
+    assert len(logs._tails) == 0
+
+
+def test_tail_job_logs_raises_on_an_unknown_job(mock_client):
+    client = growing_job_client(mock_client, [404], [404])
+    with pytest.raises(UnexpectedStatus):
+        list(tail_job_logs("job-id", client, poll_interval=0))
+    client = growing_job_client(mock_client, [b"a\n"], [404])
+    with pytest.raises(UnexpectedStatus):
+        list(tail_job_logs("job-id", client, poll_interval=0))
+
+
+def test_tail_job_logs_times_out(mock_client):
+    client = growing_job_client(mock_client, [b"a\n"], [503])
+    with pytest.raises(TimeoutError):
+        list(tail_job_logs("job-id", client, poll_interval=0.01, timeout=0.05))
+
+
+def test_tail_job_logs_skips_failed_reads(mock_client):
+    client = growing_job_client(
+        mock_client,
+        [b"a\n", 503, b"a\nb\n", 503, b"a\nb\nc"],
+        ["RUNNING", "RUNNING", "DONE"],
+    )
+    lines = list(tail_job_logs("job-id", client, poll_interval=0))
+    assert lines == ["a", "b", "c"]
+
+
+async def test_tail_job_logs_async_follows_until_job_is_over(mock_client):
+    client = growing_job_client(mock_client, [b"a\n", b"a\nb\n"], ["DONE"])
+    lines = [line async for line in tail_job_logs_async("job-id", client)]
+    assert lines == ["a", "b"]
+
+
+def test_get_new_logs_of_job_remembers_offset(mock_client):
+    client = growing_job_client(mock_client, [b"a\nb\n", b"a\nb\nc\n"], [])
+
+    @flow
+    def test_flow():
+        return get_new_logs_of_job("job-id", client), get_new_logs_of_job(
+            "job-id", client
+        )
+
+    assert test_flow() == ("a\nb", "c")
+
+
+def test_mirror_logs_of_job(mock_client):
+    client = growing_job_client(mock_client, [b"a\n", b"a\nb\n"], ["RUNNING", "FAILED"])
+
+    @flow
+    def test_flow():
+        return mirror_logs_of_job("job-id", client, poll_interval=0)
+
+    assert test_flow() == 2
@@ -0,0 +1,127 @@
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.api.job import job_get, job_new
+from ov_hcloud_ai_solution_client.models import JobSpec
+
+from prefect_ovh.client import acall_api, call_api
+from prefect_ovh.metrics import ApiCall, ApiMetrics, Histogram, get_api_metrics
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    get_api_metrics().reset()
+    yield get_api_metrics()
+    get_api_metrics().reset()
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def client(mock_client, sent):
+    responses = iter([httpx.Response(429, headers={"Retry-After": "0"})])
+
+    def handler(request):
+        sent.append(request.content)
+        if request.method == "POST":
+            return next(responses, httpx.Response(200, json={"id": "job-1"}))
+        return httpx.Response(200, json={"id": "job-1", "status": {"state": "DONE"}})
+
+    return mock_client(handler, base_url="https://metrics.test")
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(0.99) is None
+    assert histogram.sum == pytest.approx(5.6)
+
+
+def test_call_api_records_latency_status_retries_and_bytes(client, metrics, sent):
+    spec = {"image": "ubuntu", "resources": {"gpu": 1}}
+    call_api(job_new, client, json_body=JobSpec.from_dict(spec))
+    call_api(job_get, client, id="job-1")
+    summary = metrics.summary()
+    assert list(summary) == ["job_get", "job_new"]
+    assert summary["job_new"]["calls"] == 1
+    assert summary["job_new"]["retries"] == 1
+    assert summary["job_new"]["status_codes"] == {200: 1}
+    assert summary["job_new"]["bytes_in"] == len(b'{"id":"job-1"}')
+    assert summary["job_new"]["bytes_out"] == len(sent[0]) > 0
+    assert summary["job_get"]["bytes_out"] == 0
+    assert summary["job_get"]["mean"] >= 0
+
+
+async def test_acall_api_records_calls(client, metrics, sent):
+    await acall_api(job_get, client, id="job-1")
+    spec = JobSpec.from_dict({"image": "ubuntu"})
+    await acall_api(job_new, client, json_body=spec)
+    assert metrics.summary()["job_get"]["calls"] == 1
+    assert metrics.summary()["job_new"]["bytes_out"] == len(sent[-1]) > 0
+
+
+def test_failed_calls_are_recorded_with_status_0(mock_client, metrics):
+    def handler(request):
+        raise httpx.ConnectError("unreachable")
+
+    client = mock_client(handler, base_url="https://down.test")
+    with pytest.raises(httpx.ConnectError):
+        call_api(job_get, client, id="job-1")
+    assert metrics.summary()["job_get"]["status_codes"] == {0: 1}
+
+
+def test_callbacks(client, metrics):
+    calls = []
+    metrics.add_callback(calls.append)
+    call_api(job_get, client, id="job-1")
+    metrics.remove_callback(calls.append)
+    call_api(job_get, client, id="job-1")
+    assert [(call.endpoint, call.status_code) for call in calls] == [("job_get", 200)]
+
+
+def test_to_prometheus():
+    metrics = ApiMetrics(buckets=(0.1, 1.0))
+    metrics.record(ApiCall("job_get", 200, 0.05, bytes_in=10))
+    metrics.record(ApiCall("job_get", 429, 0.5, retries=5))
+    text = metrics.to_prometheus()
+    assert (
+        'prefect_ovh_api_call_duration_seconds_bucket{endpoint="job_get",le="0.1"} 1'
+        in text
+    )
+    assert (
+        'prefect_ovh_api_call_duration_seconds_bucket{endpoint="job_get",le="+Inf"} 2'
+        in text
+    )
+    assert 'prefect_ovh_api_call_duration_seconds_count{endpoint="job_get"} 2' in text
+    assert (
+        'prefect_ovh_api_responses_total{endpoint="job_get",status_code="429"} 1'
+        in text
+    )
+    assert 'prefect_ovh_api_retries_total{endpoint="job_get"} 5' in text
+    assert 'prefect_ovh_api_received_bytes_total{endpoint="job_get"} 10' in text
+
+
+def test_serve_prometheus():
+    metrics = ApiMetrics()
+    metrics.record(ApiCall("me", 200, 0.01))
+    server = metrics.serve_prometheus(port=0, addr="127.0.0.1")
+    try:
+        response = httpx.get(f"http://127.0.0.1:{server.server_address[1]}/metrics")
+    finally:
+        server.shutdown()
+    assert response.status_code == 200
+    assert response.text == metrics.to_prometheus()
+
+
+def test_to_markdown():
+    metrics = ApiMetrics(buckets=(0.1, 1.0))
+    metrics.record(ApiCall("job_kill", 200, 0.05))
+    assert "| job_kill | 1 | 0.050 | <= 0.1 | <= 0.1 | 0 | 200: 1 | 0 | 0 |" in (
+        metrics.to_markdown()
+    )
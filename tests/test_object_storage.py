@@ -0,0 +1,228 @@
+import hashlib
+import os
+
+import httpx
+import pytest
+from prefect.settings import PREFECT_HOME, temporary_settings
+
+from prefect_ovh.client import use_client
+from prefect_ovh.object_storage import (
+    MANIFEST_NAME,
+    MiB,
+    OvhcloudObjectStorage,
+    _etag_matches,
+    _hash_cache_path,
+    collect_job_outputs,
+    sync_dataset,
+)
+
+
+@pytest.fixture
+def prefect_home(tmp_path_factory):
+    """A Prefect home out of the datasets of the tests"""
+    home = tmp_path_factory.mktemp("home")
+    with temporary_settings({PREFECT_HOME: home}):
+        yield home
+
+
+def test_write_and_read_path(object_storage):
+    key = object_storage.write_path("results/metrics.json", b'{"loss": 0.1}')
+    assert key == "results/metrics.json"
+    assert object_storage.read_path("results/metrics.json") == b'{"loss": 0.1}'
+
+
+async def test_write_and_read_path_async(object_storage):
+    await object_storage.write_path("async.txt", b"content")
+    assert await object_storage.read_path("async.txt") == b"content"
+
+
+def test_multipart_upload_and_ranged_download(object_storage, tmp_path):
+    content = os.urandom(11 * MiB)
+    source = tmp_path / "dataset.bin"
+    source.write_bytes(content)
+    object_storage.upload_file(source, "datasets/dataset.bin")
+    objects = list(object_storage.list_objects("datasets/"))
+    assert [obj["Key"] for obj in objects] == ["datasets/dataset.bin"]
+    # an ETag ending with the number of parts is the sign of a multipart upload
+    assert objects[0]["ETag"].strip('"').endswith("-3")
+    target = object_storage.download_file(
+        "datasets/dataset.bin", tmp_path / "copy" / "dataset.bin"
+    )
+    assert target.read_bytes() == content
+
+
+def test_basepath(object_storage):
+    object_storage.basepath = "flows/"
+    assert object_storage.write_path("result", b"1") == "flows/result"
+    assert [obj["Key"] for obj in object_storage.list_objects()] == ["flows/result"]
+
+
+def test_default_endpoint_is_the_one_of_the_region():
+    storage = OvhcloudObjectStorage(
+        bucket="bucket", region="bhs", access_key_id="access", secret_access_key="s"
+    )
+    client = storage._get_s3_client()
+    assert client.meta.endpoint_url == "https://s3.bhs.io.cloud.ovh.net"
+    assert storage._get_s3_client() is client
+
+
+def test_sync_directory_uploads_only_changes(object_storage, prefect_home, tmp_path):
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "a.png").write_bytes(b"a" * 10)
+    (tmp_path / "labels.csv").write_bytes(b"b" * 20)
+    report = object_storage.sync_directory(tmp_path, "dataset")
+    assert report == {
+        "uploaded": 2,
+        "skipped": 0,
+        "deleted": 0,
+        "bytes_sent": 30,
+        "bytes_skipped": 0,
+    }
+    assert object_storage.read_path("dataset/images/a.png") == b"a" * 10
+
+    (tmp_path / "labels.csv").write_bytes(b"c" * 25)
+    (tmp_path / "images" / "a.png").unlink()
+    report = object_storage.sync_directory(tmp_path, "dataset", delete=True)
+    assert report == {
+        "uploaded": 1,
+        "skipped": 0,
+        "deleted": 1,
+        "bytes_sent": 25,
+        "bytes_skipped": 0,
+    }
+    keys = {obj["Key"] for obj in object_storage.list_objects("dataset/")}
+    assert keys == {"dataset/labels.csv", f"dataset/{MANIFEST_NAME}"}
+
+    report = object_storage.sync_directory(tmp_path, "dataset")
+    assert (report["uploaded"], report["skipped"], report["bytes_skipped"]) == (
+        0,
+        1,
+        25,
+    )
+
+
+def test_sync_directory_keeps_its_cache_out_of_the_directory(
+    object_storage, prefect_home, tmp_path
+):
+    dataset = tmp_path / "dataset"
+    dataset.mkdir()
+    (dataset / "data.txt").write_bytes(b"data")
+    object_storage.sync_directory(dataset)
+    assert [path.name for path in dataset.iterdir()] == ["data.txt"]
+    assert prefect_home in _hash_cache_path(dataset).parents
+    assert "data.txt" in _hash_cache_path(dataset).read_text()
+
+
+def test_sync_directory_without_a_writable_cache(object_storage, tmp_path):
+    home = tmp_path / "home"
+    home.write_text("not a directory")
+    dataset = tmp_path / "dataset"
+    dataset.mkdir()
+    (dataset / "data.txt").write_bytes(b"data")
+    with temporary_settings({PREFECT_HOME: home}):
+        assert object_storage.sync_directory(dataset)["uploaded"] == 1
+
+
+def test_sync_directory_uploads_objects_missing_from_the_container(
+    object_storage, prefect_home, tmp_path
+):
+    (tmp_path / "data.txt").write_bytes(b"data")
+    object_storage.sync_directory(tmp_path)
+    object_storage._delete(["data.txt"])
+    assert object_storage.sync_directory(tmp_path)["uploaded"] == 1
+    assert object_storage.read_path("data.txt") == b"data"
+
+
+def test_sync_dataset(object_storage, prefect_home, tmp_path):
+    (tmp_path / "data.txt").write_bytes(b"data")
+    report = sync_dataset.fn(object_storage, str(tmp_path), max_workers=2)
+    assert report["bytes_sent"] == 4
+
+
+@pytest.fixture
+def job_client(mock_client, object_storage):
+    """A client whose job `job-1` writes its outputs in `run-1/` of the bucket"""
+    volume = {
+        "dataStore": {
+            "alias": "GRA",
+            "container": object_storage.bucket,
+            "prefix": "run-1",
+        },
+        "mountPath": "/workspace/outputs",
+        "permission": "RW",
+    }
+    job = {"id": "job-1", "spec": {"volumes": [volume]}, "status": {"state": "DONE"}}
+    return mock_client(
+        lambda request: httpx.Response(200, json=job), base_url="https://api.test"
+    )
+
+
+def test_collect_job_outputs(object_storage, job_client, tmp_path):
+    checkpoint = os.urandom(11 * MiB)
+    source = tmp_path / "checkpoint.pt"
+    source.write_bytes(checkpoint)
+    object_storage.upload_file(source, "run-1/checkpoints/last.pt")
+    object_storage.write_path("run-1/checkpoints/best.pt", b"best")
+    object_storage.write_path("run-1/logs.txt", b"logs")
+
+    paths = collect_job_outputs.fn(
+        "job-1",
+        "checkpoints/*.pt",
+        tmp_path / "outputs",
+        job_client,
+        storage=object_storage,
+    )
+    outputs = tmp_path / "outputs" / "checkpoints"
+    assert sorted(paths) == [outputs / "best.pt", outputs / "last.pt"]
+    assert (outputs / "last.pt").read_bytes() == checkpoint
+    assert (outputs / "best.pt").read_bytes() == b"best"
+    assert not (tmp_path / "outputs" / "logs.txt").exists()
+
+
+def test_collect_job_outputs_uses_the_context_client(
+    object_storage, job_client, tmp_path
+):
+    object_storage.write_path("run-1/model.pt", b"model")
+    with use_client(job_client):
+        paths = collect_job_outputs.fn(
+            "job-1", "*.pt", tmp_path, storage=object_storage
+        )
+    assert paths == [tmp_path / "model.pt"]
+    with pytest.raises(TypeError, match="storage"):
+        collect_job_outputs.fn("job-1", "*.pt", tmp_path, job_client)
+
+
+def test_collect_job_outputs_stays_in_dest(object_storage, job_client, tmp_path):
+    for key in ["run-1/../escaped.pt", "run-1//tmp/escaped.pt"]:
+        object_storage.write_path(key, b"escaped")
+        with pytest.raises(ValueError, match="would be written out of"):
+            collect_job_outputs.fn(
+                "job-1", "*", tmp_path / "outputs", job_client, storage=object_storage
+            )
+        object_storage._delete([key])
+    assert not (tmp_path / "escaped.pt").exists()
+
+
+def test_collect_job_outputs_needs_the_volume(object_storage, job_client, tmp_path):
+    with pytest.raises(ValueError, match="no volume mounted at '/data'"):
+        collect_job_outputs.fn(
+            "job-1",
+            "*",
+            tmp_path,
+            job_client,
+            storage=object_storage,
+            mount_path="/data",
+        )
+
+
+def test_etag_matches(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"a" * (13 * MiB))
+    whole = hashlib.md5(path.read_bytes()).hexdigest()
+    assert _etag_matches(path, f'"{whole}"', 5 * MiB)
+    assert not _etag_matches(path, '"0123456789abcdef0123456789abcdef"', 5 * MiB)
+    parts = [b"a" * (7 * MiB), b"a" * (6 * MiB)]
+    multipart = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts))
+    # uploaded in 7 MiB parts, guessed from the size and the number of parts
+    assert _etag_matches(path, f"{multipart.hexdigest()}-2", 5 * MiB)
+    assert not _etag_matches(path, f"{whole}-2", 5 * MiB)
@@ -0,0 +1,83 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from prefect_ovh.rate_limit import (
+    TokenBucket,
+    configure_rate_limiter,
+    get_rate_limiter,
+    parse_retry_after,
+)
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_throttled_blocks_and_slows_down():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.on_throttled(retry_after=2)
+    assert bucket.rate == 5
+    assert bucket.reserve() == pytest.approx(2, abs=0.01)
+    bucket.on_success()
+    assert bucket.rate == 5.5
+
+
+def test_token_bucket_does_not_go_below_min_rate():
+    bucket = TokenBucket(rate=10, capacity=5, min_rate=4)
+    for _ in range(3):
+        bucket.on_throttled(retry_after=0)
+    assert bucket.rate == 4
+
+
+def test_token_bucket_acquire_waits():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+async def test_token_bucket_acquire_async_waits():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire_async()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limiter_shared_per_token_and_region():
+    limiter = get_rate_limiter("token", "https://gra.training.ai.cloud.ovh.net")
+    assert limiter is get_rate_limiter(
+        "token", "https://gra.training.ai.cloud.ovh.net/"
+    )
+    assert limiter is not get_rate_limiter(
+        "token", "https://bhs.training.ai.cloud.ovh.net"
+    )
+    assert limiter is not get_rate_limiter(
+        "other", "https://gra.training.ai.cloud.ovh.net"
+    )
+
+
+def test_configure_rate_limiter_replaces_limiter():
+    limiter = configure_rate_limiter("token", "http://configured", rate=1, capacity=1)
+    assert get_rate_limiter("token", "http://configured") is limiter
+    assert limiter.rate == 1
+
+
+@pytest.mark.parametrize(
+    "headers,expected",
+    [({}, None), ({"Retry-After": "3"}, 3), ({"Retry-After": "soon"}, None)],
+)
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_http_date():
+    headers = {"Retry-After": formatdate(time.time() + 30, usegmt=True)}
+    assert parse_retry_after(headers) == pytest.approx(30, abs=2)
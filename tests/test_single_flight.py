@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from prefect_ovh.single_flight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    get_async_single_flight,
+)
+
+
+def test_single_flight_shares_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flight.do, "key", slow_call)
+        started.wait()
+        followers = [executor.submit(flight.do, "key", slow_call) for _ in range(4)]
+        results = [leader.result()] + [future.result() for future in followers]
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+def test_single_flight_runs_sequential_calls_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing_call():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", failing_call)
+        started.wait()
+        follower = executor.submit(flight.do, "key", failing_call)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+async def test_async_single_flight_shares_concurrent_calls():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", slow_call) for _ in range(5)))
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+async def test_async_single_flight_retries_when_leader_is_cancelled():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    leader = asyncio.ensure_future(flight.do("key", slow_call))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("key", slow_call))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "result"
+    assert len(calls) == 2
+
+
+async def test_get_async_single_flight_is_per_loop():
+    assert get_async_single_flight() is get_async_single_flight()
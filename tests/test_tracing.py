@@ -0,0 +1,65 @@
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.api.job import job_get, job_kill
+
+from prefect_ovh import tracing
+from prefect_ovh.client import acall_api, call_api
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+in_memory = pytest.importorskip(
+    "opentelemetry.sdk.trace.export.in_memory_span_exporter"
+)
+export = pytest.importorskip("opentelemetry.sdk.trace.export")
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Collects the finished spans of the calls"""
+    exporter = in_memory.InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing.trace, "get_tracer", provider.get_tracer)
+    return exporter.get_finished_spans
+
+
+@pytest.fixture
+def client(mock_client):
+    def handler(request):
+        if request.url.path.endswith("/kill"):
+            return httpx.Response(404, json={"message": "not found"})
+        return httpx.Response(200, json={"id": "job-1", "status": {"state": "DONE"}})
+
+    return mock_client(handler, base_url="https://tracing.test")
+
+
+def test_call_api_creates_a_span(client, spans):
+    call_api(job_get, client, id="job-1")
+    (span,) = spans()
+    assert span.name == "ovhcloud.ai job_get"
+    assert span.kind == tracing.trace.SpanKind.CLIENT
+    assert span.attributes["ovhcloud.ai.endpoint"] == "job_get"
+    assert span.attributes["ovhcloud.ai.job_id"] == "job-1"
+    assert span.attributes["http.status_code"] == 200
+    assert span.attributes["ovhcloud.ai.retries"] == 0
+
+
+async def test_error_responses_mark_the_span(client, spans):
+    await acall_api(job_kill, client, id="job-1")
+    (span,) = spans()
+    assert span.status.status_code == tracing.trace.StatusCode.ERROR
+    assert span.attributes["http.status_code"] == 404
+
+
+def test_spans_are_children_of_the_current_span(client, spans):
+    tracer = tracing.trace.get_tracer("test")
+    with tracer.start_as_current_span("task run") as parent:
+        call_api(job_get, client, id="job-1")
+    child, _ = spans()
+    assert child.parent.span_id == parent.get_span_context().span_id
+
+
+def test_no_op_without_opentelemetry(client, monkeypatch):
+    monkeypatch.setattr(tracing, "trace", None)
+    with tracing.api_span("job_get", {"id": "job-1"}) as span:
+        assert span is None
+    assert call_api(job_get, client, id="job-1").status_code == 200
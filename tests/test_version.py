@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+CHECK_IMPORT = """
+import subprocess
+
+calls = []
+popen = subprocess.Popen.__init__
+
+
+def record(self, args, *rest, **kwargs):
+    calls.append(args)
+    popen(self, args, *rest, **kwargs)
+
+
+subprocess.Popen.__init__ = record
+import prefect_ovh
+
+git_calls = [args for args in calls if "git" in str(args[0])]
+assert git_calls == [], git_calls
+assert prefect_ovh.__version__
+"""
+
+
+def test_import_runs_no_git():
+    # a fresh interpreter, as the tests already imported the package
+    subprocess.run([sys.executable, "-c", CHECK_IMPORT], check=True)
+
+
+def test_version_is_cached():
+    import prefect_ovh
+
+    assert prefect_ovh.__version__ == prefect_ovh.__version__
+    assert "__version__" in vars(prefect_ovh)
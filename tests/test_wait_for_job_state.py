@@ -0,0 +1,111 @@
+import httpx
+import pytest
+from ov_hcloud_ai_solution_client.errors import UnexpectedStatus
+from prefect import flow
+
+from prefect_ovh.tasks import wait_for_job_state, wait_for_job_state_async
+
+
+def job_client(mock_client, states):
+    """A client whose job_get calls return the given states one after the other
+
+    An integer state is answered as an error with this status code.
+    """
+    states = iter(states)
+    last = {}
+
+    def handler(request):
+        last["state"] = next(states, last.get("state"))
+        if isinstance(last["state"], int):
+            return httpx.Response(last["state"], json={"message": "retry later"})
+        return httpx.Response(
+            200, json={"id": "job-id", "status": {"state": last["state"]}}
+        )
+
+    return mock_client(handler)
+
+
+def test_wait_for_job_state_returns_on_target_state(mock_client):
+    client = job_client(mock_client, ["RUNNING", "INTERRUPTING", "INTERRUPTED"])
+
+    @flow
+    def test_flow():
+        return wait_for_job_state(
+            "job-id", client, target_states=["INTERRUPTED"], poll_interval=0.01
+        )
+
+    result = test_flow()
+    assert result["state"] == "INTERRUPTED"
+    assert [state for state, _ in result["transitions"]] == [
+        "RUNNING",
+        "INTERRUPTING",
+        "INTERRUPTED",
+    ]
+
+
+def test_wait_for_job_state_retries_failed_polls(mock_client):
+    client = job_client(mock_client, ["RUNNING", 503, "INTERRUPTED"])
+
+    @flow
+    def test_flow():
+        return wait_for_job_state(
+            "job-id", client, target_states=["INTERRUPTED"], poll_interval=0.01
+        )
+
+    result = test_flow()
+    assert result["state"] == "INTERRUPTED"
+    assert [state for state, _ in result["transitions"]] == ["RUNNING", "INTERRUPTED"]
+
+
+def test_wait_for_job_state_retries_network_errors(mock_client):
+    responses = iter([httpx.ConnectError("unreachable")])
+
+    def handler(request):
+        response = next(responses, None)
+        if isinstance(response, Exception):
+            raise response
+        return httpx.Response(200, json={"id": "job-id", "status": {"state": "DONE"}})
+
+    @flow
+    def test_flow():
+        return wait_for_job_state("job-id", mock_client(handler), poll_interval=0.01)
+
+    assert test_flow()["state"] == "DONE"
+
+
+def test_wait_for_job_state_raises_on_an_unknown_job(mock_client):
+    client = job_client(mock_client, ["RUNNING", 404])
+
+    @flow
+    def test_flow():
+        return wait_for_job_state("job-id", client, poll_interval=0.01, timeout=5)
+
+    with pytest.raises(UnexpectedStatus) as info:
+        test_flow()
+    assert info.value.status_code == 404
+
+
+def test_wait_for_job_state_times_out(mock_client):
+    client = job_client(mock_client, ["RUNNING"])
+
+    @flow
+    def test_flow():
+        return wait_for_job_state(
+            "job-id", client, target_states=["DONE"], timeout=0.05, poll_interval=0.01
+        )
+
+    with pytest.raises(TimeoutError):
+        test_flow()
+
+
+async def test_wait_for_job_state_async(mock_client):
+    client = job_client(mock_client, ["QUEUED", "RUNNING"])
+
+    @flow
+    async def test_flow():
+        return await wait_for_job_state_async(
+            "job-id", client, target_states=["RUNNING"], poll_interval=0.01
+        )
+
+    result = await test_flow()
+    assert result["state"] == "RUNNING"
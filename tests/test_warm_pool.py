@@ -0,0 +1,97 @@
+import json
+import re
+
+import httpx
+import pytest
+
+from prefect_ovh.warm_pool import WARM_POOL_LABEL, WarmJobPool
+
+
+@pytest.fixture
+def api(mock_client):
+    """A fake API whose jobs are queued on their first poll, then running"""
+    state = {"specs": [], "polls": {}, "killed": [], "ended": set(), "locked": []}
+
+    def handler(request):
+        path = request.url.path
+        if "pool" in state:
+            state["locked"].append(state["pool"]._lock.locked())
+        if request.method == "POST":
+            state["specs"].append(json.loads(request.content))
+            return httpx.Response(200, json={"id": f"job-{len(state['specs'])}"})
+        job_id = re.match(r"/v1/job/([^/]+)", path).group(1)
+        if path.endswith("/kill"):
+            state["killed"].append(job_id)
+            return httpx.Response(200, json={"id": job_id})
+        polls = state["polls"][job_id] = state["polls"].get(job_id, 0) + 1
+        status = {"state": "QUEUED"}
+        if polls > 1:
+            status = {"state": "RUNNING", "url": f"https://{job_id}.job"}
+        if job_id in state["ended"]:
+            status = {"state": "DONE"}
+        return httpx.Response(200, json={"id": job_id, "status": status})
+
+    state["client"] = mock_client(handler)
+    return state
+
+
+def test_lease_waits_for_a_running_job(api):
+    pool = WarmJobPool(api["client"], {"image": "server"}, poll_interval=0)
+    job = pool.lease()
+    assert job.id == "job-1"
+    assert job.url == "https://job-1.job"
+    assert job.leased
+    assert api["specs"][0]["labels"] == {WARM_POOL_LABEL: "default"}
+
+
+def test_released_job_is_leased_again(api):
+    pool = WarmJobPool(api["client"], {"image": "server"}, size=2, poll_interval=0)
+    with pool.leased() as job:
+        first = job.id
+    with pool.leased() as job:
+        assert job.id == first
+    assert len(api["specs"]) == 2
+
+
+def test_refresh_drops_running_jobs_that_ended(api):
+    pool = WarmJobPool(api["client"], {"image": "server"}, poll_interval=0)
+    with pool.leased() as job:
+        assert job.id == "job-1"
+    api["ended"].add("job-1")
+    pool.refresh()
+    assert pool.jobs == []
+    with pool.leased() as job:
+        assert job.id == "job-2"
+
+
+def test_fill_submits_without_holding_the_lock(api):
+    pool = api["pool"] = WarmJobPool(api["client"], {"image": "server"}, size=3)
+    pool.fill()
+    pool.fill()
+    assert len(pool.jobs) == 3
+    assert api["locked"] == [False, False, False]
+
+
+def test_lease_times_out_when_pool_is_busy(api):
+    pool = WarmJobPool(api["client"], {"image": "server"}, poll_interval=0)
+    pool.lease()
+    with pytest.raises(TimeoutError):
+        pool.lease(timeout=0)
+
+
+def test_recycle_kills_idle_jobs(api):
+    pool = WarmJobPool(
+        api["client"], {"image": "server"}, size=2, min_size=1, idle_ttl=0
+    )
+    pool.fill()
+    killed = pool.recycle()
+    assert len(killed) == 1
+    assert api["killed"] == killed
+    assert len(pool.jobs) == 1
+
+
+def test_close_kills_every_job(api):
+    with WarmJobPool(api["client"], {"image": "server"}, size=3) as pool:
+        assert len(pool.jobs) == 3
+    assert sorted(api["killed"]) == ["job-1", "job-2", "job-3"]
+    assert pool.jobs == []